@@ -0,0 +1,56 @@
+# الملفات الثابتة للموقع (الأنماط والشعار)، تقرأ وتجهز مرة واحدة لكل عملية
+import base64
+import os
+from functools import lru_cache
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+LOGO_PATH = os.path.join(APP_DIR, "logo.jpg")
+
+CSS = """
+/* تكبير حجم الخط وتغيير اتجاه النصوص للموقع بالكامل إلى اليمين */
+body {
+    font-family: Arial, sans-serif;
+    direction: rtl;
+    text-align: right;
+}
+/* تكبير حجم العناوين */
+.main-title, h1, h2, h3, h4, h5, h6 {
+    font-size: 24px; /* حجم أكبر للعناوين */
+    font-weight: bold;
+    color: #333;
+}
+/* تكبير حجم النصوص فوق حقول الإدخال */
+label {
+    font-size: 20px; /* تكبير حجم النص */
+    font-weight: bold;
+    color: #333;
+}
+/* محاذاة الشعار بجانب العنوان */
+.header-container {
+    display: flex;
+    align-items: left;
+    justify-content: flex-end;
+    margin-top: 20px;
+}
+.logo {
+    width: 115px;
+    height: auto;
+    margin-left: 15px; /* فراغ بين الشعار والعنوان */
+}
+.footer {
+    position: fixed;
+    bottom: 20px;
+    width: 100%;
+    text-align: center;
+    font-size: 14px;
+    color: #333;
+}
+"""
+
+STYLE_TAG = f"<style>{CSS}</style>"
+
+
+@lru_cache(maxsize=None)
+def logo_data_uri():
+    with open(LOGO_PATH, "rb") as img_file:
+        return "data:image/jpeg;base64," + base64.b64encode(img_file.read()).decode()
@@ -0,0 +1,56 @@
+# فهرس دائم يربط بصمة محتوى المرفق (SHA-256) برابط الملف في Google Drive
+# حتى لا يتم رفع نفس الصورة مرتين (مثلاً نفس الصورة للوجه والظهر أو عند إعادة الحفظ)
+import threading
+import time
+
+from local_store import connect_db
+
+# أقصى عدد روابط في الفهرس، ويحذف الأقدم استخداماً عند تجاوزه
+MAX_ENTRIES = 5000
+
+
+class AttachmentIndex:
+    def __init__(self, db_name, rebuild=None):
+        # rebuild() ترجع (البصمة، الرابط، الوقت) من بيانات ملفات Drive عند بدء التشغيل بفهرس فارغ
+        self._lock = threading.Lock()
+        self._db = connect_db(db_name)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS attachments (
+                digest TEXT PRIMARY KEY,
+                link TEXT NOT NULL,
+                used REAL NOT NULL
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS attachments_used ON attachments (used)")
+        if rebuild and not self.count():
+            self._rebuild(rebuild)
+
+    def _rebuild(self, rebuild):
+        entries = []
+        for entry in rebuild():
+            entries.append(entry)
+            if len(entries) >= MAX_ENTRIES:
+                break
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO attachments (digest, link, used) VALUES (?, ?, ?)", entries)
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM attachments").fetchone()[0]
+
+    def get(self, digest):
+        with self._lock:
+            found = self._db.execute("SELECT link FROM attachments WHERE digest = ?", (digest,)).fetchone()
+            if found is None:
+                return None
+            self._db.execute("UPDATE attachments SET used = ? WHERE digest = ?", (time.time(), digest))
+            return found[0]
+
+    def put(self, digest, link):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO attachments (digest, link, used) VALUES (?, ?, ?)",
+                (digest, link, time.time()))
+            self._db.execute("""
+                DELETE FROM attachments WHERE digest IN (
+                    SELECT digest FROM attachments ORDER BY used DESC LIMIT -1 OFFSET ?)""", (MAX_ENTRIES,))
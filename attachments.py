@@ -0,0 +1,122 @@
+# تجهيز المرفقات قبل تضمينها في PDF ورفعها إلى Google Drive
+# صور الهواتف تصل بدقة 5-12 ميغابكسل بينما ترسم في مربع 300×300 نقطة فقط،
+# لذلك يتم تصحيح اتجاهها وتصغيرها وإعادة ضغطها مرة واحدة لكل محتوى
+import hashlib
+import io
+import math
+import os
+import threading
+from collections import OrderedDict
+
+# حجم مربع الصورة في ملف PDF بالنقاط (1/72 إنش)
+IMAGE_BOX_PT = 300
+# الدقة المطلوبة للصورة عند رسمها بالحجم أعلاه
+IMAGE_TARGET_DPI = 150
+# جودة ضغط JPEG
+IMAGE_QUALITY = 80
+# عدد الصور المجهزة المحفوظة في الذاكرة
+CACHE_SIZE = 64
+# الحد الأقصى لحجم المرفق الواحد. يمرر إلى حقول المرفقات فقط (max_upload_size بالميغابايت
+# الصحيحة)، أما ملفات الاستيراد الجماعي فتبقى بحد Streamlit العام
+MAX_ATTACHMENT_MB = float(os.environ.get("MAX_ATTACHMENT_MB", "25"))
+MAX_ATTACHMENT_BYTES = int(MAX_ATTACHMENT_MB * 1024 * 1024)
+MAX_UPLOAD_MB = math.ceil(MAX_ATTACHMENT_MB)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class MemoryAttachment:
+    # مرفق محفوظ في الذاكرة بنفس واجهة الملفات المرفوعة من st.file_uploader
+    def __init__(self, name, data, type=None):
+        self.name = name
+        self.type = type
+        self.file_id = None
+        self.size = len(data)
+        self._data = data
+
+    def getvalue(self):
+        return self._data
+
+
+def file_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def attachment_size(file):
+    # الحجم بدون قراءة المحتوى إذا كان معروفاً (الملفات المرفوعة وملفات ZIP)
+    size = getattr(file, "size", None)
+    return len(file.getvalue()) if size is None else size
+
+
+def size_error(file):
+    # رسالة الخطأ إذا تجاوز المرفق الحد المسموح، أو None
+    if attachment_size(file) > MAX_ATTACHMENT_BYTES:
+        return f"حجم الملف {file.name} أكبر من الحد المسموح ({MAX_ATTACHMENT_MB:g} ميغابايت)"
+    return None
+
+
+def is_image(file):
+    if (getattr(file, "type", None) or "").startswith("image/"):
+        return True
+    return os.path.splitext(file.name)[1].lower() in IMAGE_EXTENSIONS
+
+
+def is_pdf(file):
+    if getattr(file, "type", None) == "application/pdf":
+        return True
+    return os.path.splitext(file.name)[1].lower() == ".pdf"
+
+
+def _process_image(data, box_pt, dpi, quality):
+    # Pillow يتم استيرادها عند أول صورة فقط
+    from PIL import Image, ImageOps
+    max_px = int(box_pt / 72 * dpi)
+    img = Image.open(io.BytesIO(data))
+    # فك ضغط JPEG بدقة مخفضة مباشرة (أسرع بكثير من فك الصورة كاملة ثم تصغيرها)
+    img.draft("RGB", (max_px, max_px))
+    img = ImageOps.exif_transpose(img)
+    img.thumbnail((max_px, max_px), Image.LANCZOS)
+    if img.mode in ("RGBA", "LA", "P"):
+        # الخلفية الشفافة تصبح بيضاء لأن JPEG لا يدعم الشفافية
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, "white")
+        background.paste(img, mask=img.getchannel("A"))
+        img = background
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+    out = io.BytesIO()
+    img.save(out, format="JPEG", quality=quality, optimize=True)
+    return out.getvalue()
+
+
+def prepare_image(data, box_pt=IMAGE_BOX_PT, dpi=IMAGE_TARGET_DPI, quality=IMAGE_QUALITY):
+    # إرجاع الصورة المجهزة من الذاكرة إذا سبق تجهيز نفس المحتوى بنفس الإعدادات
+    key = (file_digest(data), box_pt, dpi, quality)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    try:
+        result = _process_image(data, box_pt, dpi, quality)
+    except Exception:
+        # صورة لا يمكن قراءتها: تستخدم كما هي
+        return data
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+
+def prepare_attachment(file):
+    # إرجاع (الاسم، المحتوى، نوع الملف) الجاهزة للرفع
+    data = file.getvalue()
+    if not is_image(file):
+        return file.name, data, getattr(file, "type", None)
+    prepared = prepare_image(data)
+    if prepared is data:
+        return file.name, data, getattr(file, "type", None)
+    return os.path.splitext(file.name)[0] + ".jpg", prepared, "image/jpeg"
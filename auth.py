@@ -0,0 +1,202 @@
+# تسجيل دخول المستخدمين بدلاً من قائمة كلمات السر المكتوبة في الكود
+# كلمات السر تحفظ في Streamlit secrets كبصمات PBKDF2 مع salt لكل مستخدم،
+# ومدراء النظام (صفحة مقاييس الأداء) في قائمة admins قبل قسم [users]:
+#     admins = ["ahmed"]
+#     [users]
+#     ahmed = "pbkdf2_sha256$200000$<salt>$<hash>"
+# ويتم إنشاء البصمة بالأمر:  python auth.py
+# بعد الدخول يحفظ رمز موقع (HMAC) مع وقت انتهاء في st.session_state، والتحقق منه
+# عند كل إعادة تشغيل للصفحة لا يحتاج حساب PBKDF2 مرة أخرى
+import getpass
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import deque
+
+import streamlit as st
+
+from google_services import get_secret, use_fake_backend
+
+HASH_ALGORITHM = "pbkdf2_sha256"
+HASH_ITERATIONS = 200_000
+# مدة صلاحية الدخول (بالثواني)
+SESSION_TTL = 8 * 3600
+# عدد المحاولات الفاشلة المسموحة لكل مستخدم خلال FAILURE_WINDOW ثانية
+MAX_FAILURES = 5
+# ولكل عنوان IP: جميع موظفي المكتب قد يظهرون بنفس العنوان (NAT أو proxy)، لذلك الحد أعلى
+# بكثير حتى لا تمنع أخطاء الكتابة القليلة دخول الجميع، ويبقى مانعاً لتجربة أسماء كثيرة
+MAX_IP_FAILURES = 50
+FAILURE_WINDOW = 300
+
+TOKEN_KEY = "auth_token"
+
+# حساب للتجربة المحلية فقط (مع FAKE_GOOGLE_BACKEND=1 وبدون مستخدمين في الأسرار)
+DEV_USERS = {"clerk": "0102"}
+
+
+def hash_password(password, salt=None, iterations=HASH_ITERATIONS):
+    salt = salt or secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), iterations).hex()
+    return f"{HASH_ALGORITHM}${iterations}${salt}${digest}"
+
+
+@st.cache_resource(show_spinner=False)
+def _dummy_hash():
+    # بصمة ثابتة لحساب PBKDF2 عند اسم مستخدم غير موجود، حتى لا يكشف زمن الرد الأسماء الموجودة
+    return hash_password(secrets.token_hex(16))
+
+
+def verify_password(password, stored):
+    try:
+        algorithm, iterations, salt, _ = stored.split("$")
+    except ValueError:
+        return False
+    if algorithm != HASH_ALGORITHM:
+        return False
+    return hmac.compare_digest(hash_password(password, salt, int(iterations)), stored)
+
+
+@st.cache_resource(show_spinner=False)
+def get_users():
+    # {اسم المستخدم: بصمة كلمة السر}
+    users = get_secret("users")
+    if users:
+        return dict(users)
+    if use_fake_backend():
+        return {name: hash_password(password) for name, password in DEV_USERS.items()}
+    return {}
+
+
+def is_admin(username):
+    admins = get_secret("admins")
+    if admins is None and use_fake_backend() and not get_secret("users"):
+        admins = list(DEV_USERS)
+    return bool(username) and username in (admins or [])
+
+
+@st.cache_resource(show_spinner=False)
+def _signing_key():
+    # بدون session_secret في الأسرار يتم إنشاء مفتاح جديد عند كل تشغيل للخادم
+    # (وتنتهي جميع الجلسات عند إعادة التشغيل)
+    key = get_secret("session_secret")
+    return key.encode() if key else secrets.token_bytes(32)
+
+
+def _signature(username, expires):
+    return hmac.new(_signing_key(), f"{username}:{expires}".encode(), hashlib.sha256).hexdigest()
+
+
+def issue_token(username, ttl=SESSION_TTL):
+    expires = int(time.time() + ttl)
+    return f"{username}:{expires}:{_signature(username, expires)}"
+
+
+def verify_token(token):
+    # اسم المستخدم إذا كان الرمز صحيحاً ولم تنته صلاحيته، وإلا None
+    try:
+        username, expires, signature = token.rsplit(":", 2)
+        expires = int(expires)
+    except (AttributeError, ValueError):
+        return None
+    if expires < time.time() or not hmac.compare_digest(signature, _signature(username, expires)):
+        return None
+    return username
+
+
+class FailedLogins:
+    # تسجيل المحاولات الفاشلة (مشترك بين جميع الجلسات) لمنع تجربة كلمات السر بسرعة
+    def __init__(self, limits=None, window=FAILURE_WINDOW):
+        # limits: {نوع المفتاح ("user" أو "ip"): عدد المحاولات الفاشلة المسموحة}
+        self._limits = limits or {"user": MAX_FAILURES, "ip": MAX_IP_FAILURES}
+        self._window = window
+        self._failures = {}
+        self._lock = threading.Lock()
+
+    def _recent(self, key, now):
+        failures = self._failures.get(key)
+        while failures and failures[0] <= now - self._window:
+            failures.popleft()
+        if failures is not None and not failures:
+            del self._failures[key]
+            return None
+        return failures
+
+    def retry_after(self, keys):
+        # عدد الثواني المتبقية حتى يسمح بمحاولة جديدة (0 إذا كان مسموحاً)
+        now = time.time()
+        wait = 0.0
+        with self._lock:
+            for key in keys:
+                failures = self._recent(key, now)
+                if failures and len(failures) >= self._limits[key[0]]:
+                    wait = max(wait, failures[0] + self._window - now)
+        return wait
+
+    def record(self, keys):
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                self._recent(key, now)
+                self._failures.setdefault(key, deque()).append(now)
+
+    def clear(self, keys):
+        with self._lock:
+            for key in keys:
+                self._failures.pop(key, None)
+
+
+@st.cache_resource(show_spinner=False)
+def get_failed_logins():
+    return FailedLogins()
+
+
+def _client_keys(username):
+    keys = [("user", username)]
+    ip_address = getattr(st.context, "ip_address", None)
+    if ip_address:
+        keys.append(("ip", ip_address))
+    return keys
+
+
+def login(username, password):
+    # إرجاع (اسم المستخدم، None) عند النجاح أو (None، رسالة الخطأ)
+    username = (username or "").strip()
+    keys = _client_keys(username)
+    failed = get_failed_logins()
+    wait = failed.retry_after(keys)
+    if wait:
+        # الرفض قبل حساب البصمة حتى لا تشغل المحاولات المتكررة الخادم
+        return None, f"محاولات كثيرة خاطئة. يرجى المحاولة بعد {int(wait) + 1} ثانية."
+    stored = get_users().get(username)
+    valid = verify_password(password, stored or _dummy_hash())
+    if stored is None or not valid:
+        failed.record(keys)
+        return None, "اسم المستخدم أو كلمة السر غير صحيحة."
+    failed.clear(keys)
+    st.session_state[TOKEN_KEY] = issue_token(username)
+    return username, None
+
+
+def logout():
+    st.session_state.pop(TOKEN_KEY, None)
+
+
+def current_user():
+    username = verify_token(st.session_state.get(TOKEN_KEY))
+    if username is None:
+        st.session_state.pop(TOKEN_KEY, None)
+    return username
+
+
+def main():
+    # طباعة بصمة كلمة سر لإضافتها في قسم [users] في ملف الأسرار
+    password = getpass.getpass("كلمة السر: ")
+    if password != getpass.getpass("تأكيد كلمة السر: "):
+        raise SystemExit("كلمتا السر غير متطابقتين")
+    print(hash_password(password))
+
+
+if __name__ == "__main__":
+    main()
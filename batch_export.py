@@ -0,0 +1,163 @@
+# تصدير ملفات PDF لمجموعة من السجلات المحفوظة (مثلاً جميع موظفي قسم معين)
+# المرفقات تحمل من Drive بالتوازي، وملفات PDF تنشأ في مجموعة عمليات منفصلة،
+# ولا يكون في الذاكرة إلا عدد محدود من السجلات في كل مرحلة مهما كان عدد السجلات
+import datetime
+import io
+import multiprocessing
+import os
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import streamlit as st
+from pypdf import PdfReader, PdfWriter
+
+from attachments import MemoryAttachment
+from form_schema import DATE, pdf_content
+from google_services import DriveFileMissing, download_file, with_worksheet
+from pdf_export import generate_pdf
+from record_index import normalize
+
+# عدد السجلات في كل مرحلة من مراحل التصدير (تحميل المرفقات، إنشاء PDF)
+WINDOW = 8
+DOWNLOAD_WORKERS = 8
+RENDER_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+
+ZIP = "zip"
+COMBINED = "combined"
+
+# حدود التصدير من صفحة الموقع، لأن الملف الناتج يقرأ كاملاً إلى الذاكرة لإرساله للمتصفح
+# (ودمج ملف PDF واحد يبقي جميع الصفحات في الذاكرة حتى نهايته)
+MAX_EXPORT_RECORDS = int(os.environ.get("MAX_EXPORT_RECORDS", "200"))
+MAX_EXPORT_MB = float(os.environ.get("MAX_EXPORT_MB", "200"))
+MAX_EXPORT_BYTES = int(MAX_EXPORT_MB * 1024 * 1024)
+
+_DRIVE_ID = re.compile(r"/d/([^/?#]+)|[?&]id=([^&#]+)")
+
+
+@st.cache_resource(show_spinner=False)
+def get_render_pool():
+    # spawn بدلاً من fork لأن خادم Streamlit يعمل بعدة خيوط
+    return ProcessPoolExecutor(max_workers=RENDER_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+
+def drive_file_id(link):
+    match = _DRIVE_ID.search(link or "")
+    return match and (match.group(1) or match.group(2))
+
+
+def _parse_date(value):
+    try:
+        return datetime.date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def read_records(form, department=None, date_key=None, start=None, end=None):
+    # قراءة سجلات الورقة وتصفيتها حسب القسم و/أو فترة زمنية على أحد حقول التاريخ
+    rows = with_worksheet(form.sheet, lambda worksheet: worksheet.get_all_values())
+    keys = [f.key for f in form.fields]
+    department = normalize(department)
+    for number, row in enumerate(rows, start=1):
+        values = dict(zip(keys, row))
+        # تجاهل صف العناوين إن وجد
+        if normalize(values.get("computer_no")) == form.fields_by_key["computer_no"].label:
+            continue
+        if department and normalize(values.get("department")) != department:
+            continue
+        if date_key and (start or end):
+            date = _parse_date(values.get(date_key))
+            if date is None or (start and date < start) or (end and date > end):
+                continue
+        yield number, values
+
+
+def _download(link):
+    file_id = drive_file_id(link)
+    if not file_id:
+        return None
+    name, data, mimetype = download_file(file_id)
+    return MemoryAttachment(name, data, mimetype)
+
+
+def _start_downloads(pool, form, values):
+    # بدء تحميل مرفقات السجل (الروابط المخزنة في أعمدة المرفقات)
+    return {f.key: pool.submit(_download, values.get(f.key)) for f in form.attachments if values.get(f.key)}
+
+
+def _collect(form, number, values, downloads, skipped):
+    values = dict(values)
+    for f in form.attachments:
+        future = downloads.get(f.key)
+        try:
+            values[f.key] = future.result() if future else None
+        except DriveFileMissing:
+            # مرفق محذوف من Drive: يصدر السجل بدونه ويعرض في قائمة المرفقات المتجاوزة
+            # (أما الأخطاء الأخرى فتوقف التصدير حتى لا تصدر ملفات ناقصة دون علم المستخدم)
+            values[f.key] = None
+            if skipped is not None:
+                skipped.append((number, f.label))
+    return values
+
+
+def _file_name(form, number, values):
+    return f"{form.name}_{number}_{normalize(values.get('computer_no')) or 'record'}.pdf"
+
+
+def export_records(form, records, output, mode=ZIP, on_progress=None, max_bytes=None, skipped=None):
+    # كتابة ملفات PDF للسجلات في output (ملف ZIP أو ملف PDF واحد)
+    # on_progress(عدد السجلات المصدرة) تستدعى بعد كل سجل
+    # skipped: قائمة تضاف إليها (رقم الصف، اسم المرفق) للمرفقات المحذوفة من Drive
+    # max_bytes: إيقاف التصدير بخطأ ValueError إذا تجاوز مجموع حجم ملفات PDF هذا الحد
+    render_pool = get_render_pool()
+    archive = zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) if mode == ZIP else None
+    writer = PdfWriter() if mode == COMBINED else None
+    downloading = deque()
+    rendering = deque()
+    exported = 0
+    size = 0
+
+    def write_next():
+        nonlocal exported, size
+        name, future = rendering.popleft()
+        pdf_bytes = future.result()
+        size += len(pdf_bytes)
+        if max_bytes and size > max_bytes:
+            raise ValueError(f"حجم ملف التصدير أكبر من الحد المسموح ({max_bytes / 1024 / 1024:g} ميغابايت). "
+                             "يرجى تضييق التصفية.")
+        if archive:
+            archive.writestr(name, pdf_bytes)
+        else:
+            writer.append(PdfReader(io.BytesIO(pdf_bytes)))
+        exported += 1
+        if on_progress:
+            on_progress(exported)
+
+    def render_next():
+        number, values, downloads = downloading.popleft()
+        values = _collect(form, number, values, downloads, skipped)
+        data, images = pdf_content(form, values)
+        rendering.append((_file_name(form, number, values), render_pool.submit(generate_pdf, data, images)))
+        if len(rendering) > WINDOW:
+            write_next()
+
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS, thread_name_prefix="download") as download_pool:
+        for number, values in records:
+            downloading.append((number, values, _start_downloads(download_pool, form, values)))
+            if len(downloading) > WINDOW:
+                render_next()
+        while downloading:
+            render_next()
+    while rendering:
+        write_next()
+
+    if archive:
+        archive.close()
+    else:
+        writer.write(output)
+    return exported
+
+
+def date_fields(form):
+    return [f for f in form.fields if f.kind == DATE]
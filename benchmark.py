@@ -0,0 +1,471 @@
+# قياس أداء الموقع بدون اتصال بالإنترنت باستخدام البديل المحلي لخدمات Google (fake_google.py)
+# كل مدخل بيانات يشغل الصفحة في AppTest خاص به ويحفظ سجلات في النماذج الثلاثة بالتناوب،
+# والنتائج تحفظ بصيغة JSON لمقارنتها مع تشغيل سابق:
+#     python benchmark.py --clerks 8 --records 5 --latency 0.2 --error-rate 0.02 --output new.json
+#     python benchmark.py --clerks 8 --records 5 --baseline old.json
+# وقياسات منفصلة لمرحلة واحدة باستخدام --mode:
+#     python benchmark.py --mode pdf-fields --repeat 20     إنشاء PDF لنموذج من 200 حقل نصي طويل
+#     python benchmark.py --mode pdf-images --repeat 5      إنشاء PDF لسجل بسبع صور هاتف
+#         (مع --old-pdf يقاس generate_pdf الأصلي قبل التحسين، للمقارنة مع --baseline:
+#          python benchmark.py --mode pdf-images --old-pdf --output before.json
+#          python benchmark.py --mode pdf-images --output after.json --baseline before.json)
+#     python benchmark.py --mode startup --repeat 20        أول تشغيل للصفحة الرئيسية وإعادة تشغيلها
+#     python benchmark.py --mode upload-memory              ذاكرة رفع عشرة ملفات بحجم 20 ميغابايت
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "website.py")
+# حساب التجربة المحلية في auth.DEV_USERS
+USERNAME = "clerk"
+PASSWORD = "0102"
+# أقصى زمن انتظار لانتهاء عملية حفظ واحدة (بالثواني)
+JOB_TIMEOUT = 120.0
+# نسبة الزيادة المسموحة في p95 مقارنة بالتشغيل السابق قبل اعتبارها تراجعاً
+TOLERANCE = 0.2
+# عدد الحقول في قياس pdf-fields (نموذج أطول بكثير من النماذج الحالية ليمتد على عدة صفحات)
+PDF_FIELDS = 200
+# نص حقل طويل (عنوان سكن) يحتاج إلى تقسيم على عدة أسطر
+LONG_VALUE = "عنوان السكن الكامل في محافظة صلاح الدين قضاء بيجي حي العسكري قرب المدرسة "
+# عدد الصور وأبعادها في قياس pdf-images (صور هاتف 6.75 ميغابكسل بحجم عدة ميغابايت)
+PDF_IMAGES = 7
+PHOTO_SIZE = (3000, 2250)
+# مكتبات ثقيلة يجب ألا تستورد عند فتح الصفحة الرئيسية (تستورد عند أول استخدام فقط)
+HEAVY_MODULES = ("reportlab", "pypdf", "pydrive", "googleapiclient", "PIL", "openpyxl")
+# عدد الملفات وحجمها في قياس upload-memory
+UPLOAD_FILES = 10
+UPLOAD_FILE_MB = 20
+# الحد الأعلى لزيادة RSS أثناء الرفع: أجزاء بحجم UPLOAD_CHUNK_SIZE لكل عامل رفع مع هامش
+# لمخازن الطلبات والخيوط، وهو أقل بكثير من حجم الملفات نفسها (UPLOAD_FILES * UPLOAD_FILE_MB)
+UPLOAD_RSS_BOUND_MB = 32
+
+
+def _summary(samples):
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+def _peak_rss_mb():
+    # ru_maxrss بالكيلوبايت في Linux وبالبايت في macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _current_rss_mb():
+    # RSS الحالي من /proc (Linux)، وإلا أعلى قيمة وصل إليها
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return _peak_rss_mb()
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def _environment():
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+def _sample_image(width, height):
+    # صورة JPEG تشبه صورة هاتف لمستند (تدرج لوني مع تفاصيل) بحجم عدة ميغابايت
+    import io
+    from PIL import Image, ImageDraw
+    image = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    draw = ImageDraw.Draw(image)
+    for y in range(0, height, 40):
+        draw.text((20, y), "0123456789 " * (width // 60), fill=(20, 20, 20))
+    out = io.BytesIO()
+    image.save(out, format="JPEG", quality=92)
+    return out.getvalue()
+
+
+def _photo(width, height):
+    # صورة JPEG بتشويش عشوائي لا يضغط جيداً، فيقترب حجمها من صور الهواتف الحقيقية
+    import io
+    from PIL import Image
+    out = io.BytesIO()
+    Image.effect_noise((width, height), 60).convert("RGB").save(out, format="JPEG", quality=90)
+    return out.getvalue()
+
+
+def _wait(job):
+    deadline = time.monotonic() + JOB_TIMEOUT
+    while not job.finished:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"عملية الحفظ {job.id} لم تنته خلال {JOB_TIMEOUT:g} ثانية")
+        time.sleep(0.05)
+
+
+def _button(at, label):
+    return next(button for button in at.button if button.label == label)
+
+
+# AppTest ينشئ Runtime مشتركاً في العملية عند كل تشغيل، لذلك لا يمكن تشغيل صفحتين في نفس
+# الوقت: تشغيل الصفحات يكون واحداً تلو الآخر، أما الحفظ والرفع وإنشاء PDF فتعمل بالتوازي
+_ui_lock = threading.Lock()
+
+
+def _run(element):
+    # تشغيل الصفحة بعد التفاعل مع العنصر وإرجاع زمن التشغيل (بدون زمن انتظار الدور)
+    with _ui_lock:
+        started = time.perf_counter()
+        element.run()
+        return time.perf_counter() - started
+
+
+def run_clerk(clerk, records, attachments, image, results, errors):
+    # مدخل بيانات واحد: حفظ السجلات من الصفحة، ثم حفظ سجلات بمرفقات وإنشاء PDF لها مباشرة
+    from streamlit.testing.v1 import AppTest
+    from attachments import MemoryAttachment
+    from form_schema import FORMS, pdf_content
+    from pdf_export import generate_pdf
+    from save_jobs import FAILED, start_save
+
+    forms = list(FORMS.values())
+    at = AppTest.from_file(APP_PATH, default_timeout=JOB_TIMEOUT)
+    _run(at)
+    # رقم نسخة النموذج في مفاتيح الحقول (يزيد مع كل "سجل جديد")
+    generations = {form.name: 0 for form in forms}
+    for number in range(records):
+        form = forms[(clerk + number) % len(forms)]
+        computer_no = f"{clerk}{number:04d}{uuid.uuid4().hex[:6]}"
+        try:
+            _run(at.sidebar.selectbox[0].select(form.menu_title))
+            if any(button.label == "دخول" for button in at.button):
+                at.text_input[0].input(USERNAME)
+                at.text_input[1].input(PASSWORD)
+                _run(_button(at, "دخول").click())
+            generation = generations[form.name]
+            _run(at.text_input(key=f"{form.name}_computer_no_{generation}").input(computer_no))
+            _run(at.text_input(key=f"{form.name}_full_name_{generation}").input(f"مدخل {clerk} سجل {number}"))
+
+            started_jobs = len(at.session_state["save_jobs"]) if "save_jobs" in at.session_state else 0
+            elapsed = _run(_button(at, "حفظ البيانات").click())
+            results["ui_save"].append(elapsed)
+            if "save_jobs" not in at.session_state or len(at.session_state["save_jobs"]) == started_jobs:
+                # لم يبدأ الحفظ (مثلاً تعذر التحقق من المكررات): تسجل رسالة الصفحة وينتقل للسجل التالي
+                errors.append(f"clerk {clerk} record {number}: لم يبدأ الحفظ - "
+                              + "، ".join(str(e.value) for e in [*at.error, *at.exception]))
+                continue
+            job = at.session_state["save_jobs"][-1]
+            started = time.perf_counter()
+            _wait(job)
+            # من الضغط على زر الحفظ حتى وصول الصف إلى الورقة
+            results["save_end_to_end"].append(elapsed + time.perf_counter() - started)
+            if job.sheet()[0] == FAILED:
+                errors.append(f"{job.id}: {job.sheet()[1]}")
+
+            results["ui_pdf"].append(_run(_button(at, "تحميل كملف PDF").click()))
+            _run(_button(at, "سجل جديد").click())
+            generations[form.name] += 1
+
+            # file_uploader لا يعمل في AppTest، لذلك تحفظ السجلات ذات المرفقات مباشرة
+            values = {"computer_no": f"{computer_no}a", "full_name": "سجل بمرفقات", "marital_status": "لا"}
+            for field in form.attachments[:attachments]:
+                values[field.key] = MemoryAttachment(f"{field.key}.jpg", image, "image/jpeg")
+            started = time.perf_counter()
+            job = start_save(form, values, uuid.uuid4().hex)
+            _wait(job)
+            results["save_with_attachments"].append(time.perf_counter() - started)
+            errors.extend(f"{job.id} {key}: {detail}" for key, (status, detail) in job.attachments().items()
+                          if status == FAILED)
+
+            started = time.perf_counter()
+            generate_pdf(*pdf_content(form, values))
+            results["pdf_render"].append(time.perf_counter() - started)
+        except Exception as e:
+            errors.append(f"clerk {clerk} record {number}: {e!r}")
+
+
+def run_benchmark(clerks, records, attachments, latency, error_rate):
+    import fake_google
+    from metrics import snapshot
+
+    fake_google.configure(latency, error_rate)
+    image = _sample_image(3000, 4000)
+    results = {"ui_save": [], "save_end_to_end": [], "ui_pdf": [], "save_with_attachments": [], "pdf_render": []}
+    errors = []
+    rss_before = _peak_rss_mb()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=run_clerk, args=(clerk, records, attachments, image, results, errors),
+                                name=f"clerk-{clerk}")
+               for clerk in range(clerks)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "config": {"clerks": clerks, "records": records, "attachments": attachments,
+                   "latency": latency, "error_rate": error_rate},
+        "environment": _environment(),
+        "elapsed": elapsed,
+        "records_per_second": len(results["save_end_to_end"]) / elapsed if elapsed else 0.0,
+        "results": {name: _summary(samples) for name, samples in results.items()},
+        "memory": {"peak_rss_mb_before": rss_before, "peak_rss_mb": _peak_rss_mb()},
+        "errors": errors,
+        "stages": snapshot(),
+    }
+
+
+def run_pdf_fields(repeat, fields=PDF_FIELDS):
+    # زمن generate_pdf لنموذج من fields حقلاً بقيم طويلة، بدون صور
+    import io
+    from pypdf import PdfReader
+    from pdf_export import generate_pdf
+
+    data = {"title": "نموذج بيانات الموظف"}
+    for i in range(fields):
+        data[f"حقل رقم {i}"] = LONG_VALUE * (1 + i % 3)
+    # التشغيل الأول يسجل الخط ويملأ ذاكرة تشكيل النصوص، ولا يحسب
+    pdf = generate_pdf(dict(data), {})
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        pdf = generate_pdf(dict(data), {})
+        samples.append(time.perf_counter() - started)
+    return {
+        "config": {"mode": "pdf-fields", "fields": fields, "repeat": repeat},
+        "environment": _environment(),
+        "results": {"pdf_fields": _summary(samples)},
+        "memory": {"peak_rss_mb": _peak_rss_mb()},
+        "details": {"pages": len(PdfReader(io.BytesIO(pdf)).pages), "pdf_kb": round(len(pdf) / 1024)},
+        "errors": [],
+    }
+
+
+def _old_generate_pdf(data, images):
+    # نسخة من generate_pdf كما كانت في website.py قبل التحسين (ملفات مؤقتة للصور ولملف PDF،
+    # وتسجيل الخط مع كل صفحة)، مع إرجاع محتوى الملف كما كانت الصفحة تقرؤه للتحميل
+    import arabic_reshaper
+    from bidi.algorithm import get_display
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.pdfgen import canvas
+
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
+    c = canvas.Canvas(temp_file.name, pagesize=letter)
+    font_path = os.path.join(os.path.dirname(APP_PATH), "DejaVuSans.ttf")
+    pdfmetrics.registerFont(TTFont('DejaVu', font_path))
+    c.setFont("DejaVu", 12)
+    c.drawRightString(500, 750, get_display(arabic_reshaper.reshape(data["title"])))
+    y_position = 730
+    del data["title"]
+    for label, value in data.items():
+        bidi_label = get_display(arabic_reshaper.reshape(str(label)))
+        bidi_value = get_display(arabic_reshaper.reshape(str(value)))
+        c.drawRightString(500, y_position, f"{bidi_value} : {bidi_label}")
+        y_position -= 20
+    c.drawRightString(500, y_position, get_display(arabic_reshaper.reshape("المرفقات:")))
+    y_position -= 30
+    for label, img in images.items():
+        if img:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_img:
+                img_path = temp_img.name
+                with open(img_path, 'wb') as f:
+                    f.write(img.getvalue())
+                c.drawRightString(500, y_position, get_display(arabic_reshaper.reshape(label)))
+                y_position -= 20
+                c.drawImage(img_path, 200, y_position - 300, width=300, height=300)
+                y_position -= 320
+                c.showPage()
+                pdfmetrics.registerFont(TTFont('DejaVu', font_path))
+                c.setFont("DejaVu", 12)
+                y_position = 750
+    c.save()
+    with open(temp_file.name, "rb") as f:
+        return f.read()
+
+
+def run_pdf_images(repeat, count=PDF_IMAGES, old=False):
+    # زمن generate_pdf لسجل من 18 حقلاً مع count صورة، مرة بعد تفريغ ذاكرة الصور المجهزة
+    # (أول إنشاء PDF للسجل) ومرة مع الاستفادة منها (إعادة تحميل PDF لنفس السجل)
+    # old: قياس النسخة الأصلية _old_generate_pdf بدلاً من pdf_export.generate_pdf
+    import attachments
+    from attachments import MemoryAttachment
+    from pdf_export import generate_pdf
+
+    if old:
+        generate_pdf = _old_generate_pdf
+    data = {"title": "نموذج بيانات الموظف", **{f"حقل {i}": f"قيمة {i}" for i in range(18)}}
+    images = {f"صورة {i}": MemoryAttachment(f"{i}.jpg", _photo(*PHOTO_SIZE), "image/jpeg") for i in range(count)}
+    photo_mb = sum(image.size for image in images.values()) / 1024 / 1024
+    generate_pdf(dict(data), {})
+    rss_before = _peak_rss_mb()
+    results = {"pdf_images": [], "pdf_images_cached": []}
+    for _ in range(repeat):
+        with attachments._cache_lock:
+            attachments._cache.clear()
+        started = time.perf_counter()
+        pdf = generate_pdf(dict(data), images)
+        results["pdf_images"].append(time.perf_counter() - started)
+        started = time.perf_counter()
+        generate_pdf(dict(data), images)
+        results["pdf_images_cached"].append(time.perf_counter() - started)
+    return {
+        "config": {"mode": "pdf-images", "images": count, "photo_size": PHOTO_SIZE, "repeat": repeat, "old": old},
+        "environment": _environment(),
+        "results": {name: _summary(samples) for name, samples in results.items()},
+        "memory": {"peak_rss_mb_before": rss_before, "peak_rss_mb": _peak_rss_mb()},
+        "details": {"photos_mb": round(photo_mb, 1), "pdf_mb": round(len(pdf) / 1024 / 1024, 1)},
+        "errors": [],
+    }
+
+
+def run_startup(repeat):
+    # زمن أول تشغيل للصفحة الرئيسية في عملية جديدة (يشمل استيراد ملفات الموقع وتهيئة الموارد)
+    # ومتوسط إعادة تشغيلها، والمكتبات الثقيلة التي استوردت خلال ذلك
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=JOB_TIMEOUT)
+    started = time.perf_counter()
+    at.run()
+    first_run = time.perf_counter() - started
+    samples = []
+    for _ in range(repeat):
+        samples.append(_run(at))
+    return {
+        "config": {"mode": "startup", "repeat": repeat},
+        "environment": _environment(),
+        "results": {"startup_first_run": _summary([first_run]), "home_rerun": _summary(samples)},
+        "memory": {"peak_rss_mb": _peak_rss_mb()},
+        "details": {"heavy_modules": [name for name in HEAVY_MODULES if name in sys.modules]},
+        "errors": [str(e.value) for e in at.exception],
+    }
+
+
+def run_upload_memory(latency, error_rate, count=UPLOAD_FILES, size_mb=UPLOAD_FILE_MB):
+    # زيادة RSS أثناء رفع count ملفاً بالتوازي على أجزاء، والبديل المحلي لـ Drive يتخلص من كل
+    # جزء يستلمه (كالرفع الحقيقي)، فالزيادة هي ما يحجزه الرفع نفسه. تعد خطأً إذا تجاوزت UPLOAD_RSS_BOUND_MB
+    import fake_google
+    from attachments import MemoryAttachment
+    from google_services import UPLOAD_CHUNK_SIZE, get_drive, upload_attachments
+
+    fake_google.configure(latency, error_rate, discard=True)
+    # الملفات المصدر وخدمة Drive تحجز قبل بدء القياس
+    files = [MemoryAttachment(f"{i}.pdf", os.urandom(size_mb * 1024 * 1024), "application/pdf") for i in range(count)]
+    get_drive()
+    before = _current_rss_mb()
+    peak = [before]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(0.01):
+            peak[0] = max(peak[0], _current_rss_mb())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    started = time.perf_counter()
+    links = upload_attachments(files)
+    elapsed = time.perf_counter() - started
+    done.set()
+    sampler.join()
+    growth = max(peak[0], _current_rss_mb()) - before
+    errors = [f"{file.name}: لم يرفع" for file, link in zip(files, links) if not link]
+    if growth > UPLOAD_RSS_BOUND_MB:
+        errors.append(f"زيادة الذاكرة أثناء الرفع {growth:.1f} MB أكبر من الحد {UPLOAD_RSS_BOUND_MB} MB")
+    return {
+        "config": {"mode": "upload-memory", "files": count, "file_mb": size_mb, "chunk_kb": UPLOAD_CHUNK_SIZE // 1024,
+                   "latency": latency, "error_rate": error_rate, "rss_bound_mb": UPLOAD_RSS_BOUND_MB},
+        "environment": _environment(),
+        "results": {"upload_attachments": _summary([elapsed])},
+        "memory": {"peak_rss_mb": _peak_rss_mb()},
+        "details": {"upload_rss_growth_mb": round(growth, 1)},
+        "errors": errors,
+    }
+
+
+def compare(report, baseline, tolerance=TOLERANCE):
+    # إرجاع قائمة بالمقاييس التي زاد فيها p95 أكثر من النسبة المسموحة
+    regressions = []
+    for name, summary in report["results"].items():
+        old = baseline.get("results", {}).get(name, {})
+        if not old.get("p95") or not summary.get("p95"):
+            continue
+        ratio = summary["p95"] / old["p95"]
+        print(f"{name}: p95 {old['p95'] * 1000:.0f} ms -> {summary['p95'] * 1000:.0f} ms ({ratio:.2f}x)")
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+    old_rss = baseline.get("memory", {}).get("peak_rss_mb")
+    if old_rss:
+        new_rss = report["memory"]["peak_rss_mb"]
+        print(f"peak RSS: {old_rss:.0f} MB -> {new_rss:.0f} MB")
+        if new_rss > old_rss * (1 + tolerance):
+            regressions.append("peak_rss_mb")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="قياس أداء الموقع باستخدام البديل المحلي لخدمات Google")
+    parser.add_argument("--mode", choices=["load", "pdf-fields", "pdf-images", "startup", "upload-memory"], default="load",
+                        help="load: مدخلو بيانات متزامنون، أو قياس مرحلة واحدة")
+    parser.add_argument("--repeat", type=int, default=20, help="عدد مرات التكرار في قياس المرحلة الواحدة")
+    parser.add_argument("--old-pdf", action="store_true", help="قياس generate_pdf الأصلي في pdf-images")
+    parser.add_argument("--clerks", type=int, default=4, help="عدد مدخلي البيانات المتزامنين")
+    parser.add_argument("--records", type=int, default=3, help="عدد السجلات لكل مدخل بيانات")
+    parser.add_argument("--attachments", type=int, default=4, help="عدد الصور في كل سجل بمرفقات")
+    parser.add_argument("--latency", type=float, default=0.1, help="زمن كل طلب إلى Google (بالثواني)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="نسبة الطلبات التي تفشل")
+    parser.add_argument("--output", default="benchmark.json", help="ملف النتائج")
+    parser.add_argument("--baseline", help="نتائج تشغيل سابق للمقارنة")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+
+    # يجب تحديد البيئة قبل استيراد ملفات الموقع
+    os.environ["FAKE_GOOGLE_BACKEND"] = "1"
+    with tempfile.TemporaryDirectory(prefix="benchmark-") as data_dir:
+        os.environ["APP_DATA_DIR"] = data_dir
+        if args.mode == "pdf-fields":
+            report = run_pdf_fields(args.repeat)
+        elif args.mode == "pdf-images":
+            # الملفات المؤقتة للنسخة الأصلية تحذف مع مجلد البيانات المؤقت
+            tempfile.tempdir = data_dir
+            report = run_pdf_images(args.repeat, old=args.old_pdf)
+        elif args.mode == "startup":
+            report = run_startup(args.repeat)
+        elif args.mode == "upload-memory":
+            report = run_upload_memory(args.latency, args.error_rate)
+        else:
+            report = run_benchmark(args.clerks, args.records, args.attachments, args.latency, args.error_rate)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    for name, summary in report["results"].items():
+        if summary["count"]:
+            print(f"{name}: n={summary['count']} mean={summary['mean'] * 1000:.0f} ms "
+                  f"p95={summary['p95'] * 1000:.0f} ms")
+    for name, value in report.get("details", {}).items():
+        print(f"{name}: {value}")
+    print(f"peak RSS: {report['memory']['peak_rss_mb']:.0f} MB, errors: {len(report['errors'])}, "
+          f"results: {args.output}")
+
+    if report.get("details", {}).get("upload_rss_growth_mb", 0) > UPLOAD_RSS_BOUND_MB:
+        print(f"تجاوزت زيادة الذاكرة أثناء الرفع الحد {UPLOAD_RSS_BOUND_MB} MB")
+        return 1
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print("تراجع في الأداء: " + "، ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+# استيراد مجموعة كبيرة من السجلات من ملف CSV أو XLSX مع ملف ZIP للمرفقات
+# يمكن تشغيله من صفحة الاستيراد في الموقع أو من سطر الأوامر:
+#     python bulk_import.py employees records.xlsx scans.zip
+# أسماء الملفات داخل ZIP تكون بالشكل <رقم الحاسبة>_<مفتاح المرفق>.<الامتداد>
+# أو <رقم الحاسبة>/<مفتاح المرفق>.<الامتداد>، مثال: 12345_national_id_front.jpg
+import argparse
+import csv
+import datetime
+import getpass
+import io
+import json
+import os
+import posixpath
+import time
+import zipfile
+
+from form_schema import DATE, NUMBER, FORMS, attachment_files, sheet_row, validate
+from google_services import append_rows, column_values, upload_attachments
+from local_store import data_path
+from record_index import RecordIndex, get_record_index, normalize
+from write_queue import read_pending_rows
+
+# عدد السجلات في كل دفعة (رفع مرفقاتها بالتوازي ثم طلب append_rows واحد)
+CHUNK_SIZE = 50
+
+MIME_TYPES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".pdf": "application/pdf"}
+
+
+class ZipAttachment:
+    # مرفق داخل ملف ZIP بنفس واجهة الملفات المرفوعة من st.file_uploader
+    def __init__(self, archive, member):
+        self._archive = archive
+        self._member = member
+        self._data = None
+        self.name = posixpath.basename(member)
+        self.file_id = f"zip:{member}"
+        self.size = archive.getinfo(member).file_size
+        self.type = MIME_TYPES.get(os.path.splitext(member)[1].lower())
+
+    def getvalue(self):
+        if self._data is None:
+            self._data = self._archive.read(self._member)
+        return self._data
+
+
+def index_archive(archive):
+    # {(رقم الحاسبة، مفتاح المرفق): اسم الملف في ZIP}
+    members = {}
+    for member in archive.namelist():
+        if member.endswith("/"):
+            continue
+        stem, ext = os.path.splitext(posixpath.basename(member))
+        if ext.lower() not in MIME_TYPES:
+            continue
+        folder = posixpath.basename(posixpath.dirname(member))
+        if folder:
+            members[(folder, stem)] = member
+        elif "_" in stem:
+            owner, key = stem.split("_", 1)
+            members[(owner, key)] = member
+    return members
+
+
+def read_rows(source, name):
+    # قراءة الصفوف واحداً تلو الآخر كقواميس {عنوان العمود: القيمة}
+    ext = os.path.splitext(name)[1].lower()
+    if ext == ".csv":
+        text = source if isinstance(source, io.TextIOBase) else io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+        yield from csv.DictReader(text)
+    elif ext in (".xlsx", ".xlsm"):
+        import openpyxl
+        workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(h).strip() if h is not None else "" for h in next(rows, ())]
+            for row in rows:
+                if any(cell is not None for cell in row):
+                    yield dict(zip(header, row))
+        finally:
+            workbook.close()
+    else:
+        raise ValueError(f"نوع الملف غير مدعوم: {name}")
+
+
+def _header_map(form):
+    # يقبل عمود الجدول بمفتاح الحقل أو عنوانه في النموذج أو في ملف PDF
+    headers = {}
+    for f in form.fields:
+        for name in (f.key, f.label, f.pdf_label):
+            if name:
+                headers[name] = f.key
+    return headers
+
+
+def _convert(field, value):
+    if value is None:
+        return None
+    if field.kind == DATE and isinstance(value, datetime.datetime):
+        return value.date()
+    if field.kind == NUMBER:
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            return value
+    if isinstance(value, float) and value.is_integer():
+        # Excel يقرأ الأرقام مثل رقم الحاسبة كأعداد عشرية
+        return str(int(value))
+    return value if isinstance(value, (str, datetime.date)) else str(value)
+
+
+def record_values(form, row, headers, archive, members):
+    values = {}
+    for header, value in row.items():
+        key = headers.get(header.strip() if isinstance(header, str) else header)
+        if key and not form.fields_by_key[key].is_attachment:
+            values[key] = _convert(form.fields_by_key[key], value)
+    owner = normalize(values.get("computer_no"))
+    for f in form.attachments:
+        member = members.get((owner, f.key))
+        values[f.key] = ZipAttachment(archive, member) if member else None
+    return values
+
+
+def _checkpoint_path(checkpoint):
+    return data_path(f"bulk_import_{checkpoint}.json")
+
+
+def load_checkpoint(checkpoint):
+    # (آخر صف تمت معالجته، أرقام الصفوف قبله التي لم تستورد لفشل رفع مرفقاتها)
+    try:
+        with open(_checkpoint_path(checkpoint)) as f:
+            state = json.load(f)
+        return state["done"], state.get("failed", [])
+    except (OSError, ValueError, KeyError):
+        return 0, []
+
+
+def save_checkpoint(checkpoint, done, failed=()):
+    path = _checkpoint_path(checkpoint)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"done": done, "failed": sorted(failed)}, f)
+    os.replace(path + ".tmp", path)
+
+
+def clear_checkpoint(checkpoint):
+    try:
+        os.remove(_checkpoint_path(checkpoint))
+    except OSError:
+        pass
+
+
+def _write_chunk(form, chunk, stats, user, index):
+    # كتابة سجلات الدفعة وإرجاع أرقام الصفوف التي لم تكتب لفشل رفع أحد مرفقاتها
+    # (لا يكتب صف ناقص المرفقات، ويعاد رفعه عند تشغيل الاستيراد مرة أخرى)
+    files = [file for _, values in chunk for file in attachment_files(form, values)]
+    per_record = len(form.attachments)
+    failed = set()
+
+    def on_file(index, file, error):
+        if error:
+            failed.add(index // per_record)
+            stats["failed_uploads"].append((chunk[index // per_record][0], file.name, str(error)))
+
+    links = upload_attachments(files, on_file)
+    rows = []
+    written = []
+    for i, (_, values) in enumerate(chunk):
+        if i in failed:
+            continue
+        record_links = {f.key: links[i * per_record + j] for j, f in enumerate(form.attachments)}
+        rows.append(sheet_row(form, values, record_links, user))
+        written.append(values)
+    if rows:
+        append_rows(form.sheet, rows)
+    for values in written:
+        index.add(form, values)
+    return [chunk[i][0] for i in sorted(failed)]
+
+
+def run_import(form, rows, archive, checkpoint, chunk_size=CHUNK_SIZE, on_progress=None, user=None, index=None):
+    # استيراد الصفوف على دفعات مع حفظ نقطة الاستئناف بعد كل دفعة
+    # on_progress(stats) تستدعى بعد كتابة كل دفعة
+    # user: اسم المستخدم الذي يكتب مع كل صف
+    # index: فهرس المكررات (فهرس الموقع المشترك إذا لم يحدد)
+    headers = _header_map(form)
+    members = index_archive(archive) if archive else {}
+    done, retry = load_checkpoint(checkpoint)
+    # الصفوف التي لم تستورد لفشل رفع مرفقاتها، تعاد محاولتها في التشغيل التالي
+    held = set(retry)
+    last = done
+    index = index or get_record_index()
+    seen = set()
+    stats = {"resumed_from": done, "imported": 0, "duplicates": 0, "invalid": [], "failed_uploads": [],
+             "held_back": [], "elapsed": 0.0, "records_per_second": 0.0}
+    started = time.perf_counter()
+    chunk = []
+
+    def flush():
+        nonlocal last
+        failed = _write_chunk(form, chunk, stats, user, index)
+        held.update(failed)
+        last = max(last, chunk[-1][0])
+        save_checkpoint(checkpoint, last, held)
+        stats["imported"] += len(chunk) - len(failed)
+        stats["elapsed"] = time.perf_counter() - started
+        stats["records_per_second"] = stats["imported"] / stats["elapsed"] if stats["elapsed"] else 0.0
+        chunk.clear()
+        if on_progress:
+            on_progress(stats)
+
+    for number, row in enumerate(rows, start=1):
+        if number <= done and number not in held:
+            continue
+        held.discard(number)
+        values = record_values(form, row, headers, archive, members)
+        errors = validate(form, values)
+        if errors:
+            stats["invalid"].append((number, errors))
+            continue
+        # المفاتيح الفريدة المكررة داخل نفس الملف أو الموجودة مسبقاً في الورقة
+        keys = [(f.key, normalize(values.get(f.key))) for f in form.unique_fields]
+        keys = [key for key in keys if key[1]]
+        if any(key in seen for key in keys) or index.duplicates(form, values):
+            stats["duplicates"] += 1
+            continue
+        seen.update(keys)
+        chunk.append((number, values))
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+    stats["held_back"] = sorted(held)
+    if held:
+        # نقطة الاستئناف تبقى حتى يعاد رفع مرفقات هذه الصفوف
+        save_checkpoint(checkpoint, last, held)
+    else:
+        clear_checkpoint(checkpoint)
+    stats["elapsed"] = time.perf_counter() - started
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="استيراد مجموعة سجلات من ملف CSV أو XLSX")
+    parser.add_argument("form", choices=sorted(FORMS))
+    parser.add_argument("records", help="ملف البيانات (CSV أو XLSX)")
+    parser.add_argument("attachments", nargs="?", help="ملف ZIP للمرفقات")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--user", default=getpass.getuser(), help="اسم المستخدم الذي يكتب مع كل صف")
+    args = parser.parse_args(argv)
+
+    form = FORMS[args.form]
+    checkpoint = f"{form.name}_{os.path.basename(args.records)}"
+
+    def report(stats):
+        print(f"تم استيراد {stats['imported']} سجل ({stats['records_per_second']:.1f} سجل/ثانية)", flush=True)
+
+    # فهرس يقرأ الصفوف المنتظرة من سجل الموقع دون تشغيل خيط كتابة ثان عليه
+    index = RecordIndex(column_values, read_pending_rows)
+    archive = zipfile.ZipFile(args.attachments) if args.attachments else None
+    try:
+        with open(args.records, "rb") as source:
+            stats = run_import(form, read_rows(source, args.records), archive, checkpoint,
+                               args.chunk_size, report, args.user, index)
+    finally:
+        if archive:
+            archive.close()
+    for number, errors in stats["invalid"]:
+        print(f"الصف {number}: {'، '.join(errors)}")
+    for number, name, error in stats["failed_uploads"]:
+        print(f"الصف {number}: فشل رفع {name} - {error}")
+    if stats["held_back"]:
+        print(f"لم تستورد الصفوف {', '.join(map(str, stats['held_back']))} لفشل رفع مرفقاتها، "
+              "وتعاد محاولتها عند تشغيل نفس الأمر مرة أخرى")
+    print(f"المستورد: {stats['imported']}، المكرر: {stats['duplicates']}، غير الصالح: {len(stats['invalid'])}، "
+          f"المدة: {stats['elapsed']:.1f} ثانية")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# مسودات النماذج: القيم المدخلة تحفظ تلقائياً لكل مستخدم ونموذج حتى لا تضيع عند تحديث
+# الصفحة أو انقطاع الاتصال أو فشل الحفظ. المرفقات تحفظ على القرص مرة واحدة حسب بصمة
+# المحتوى، وتحذف المسودات القديمة والمرفقات التي لم تعد مستخدمة بعد DRAFT_TTL
+import datetime
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+from attachments import MemoryAttachment, file_digest
+from form_schema import DATE
+from local_store import connect_db, data_path
+
+# مدة الاحتفاظ بالمسودة بعد آخر تعديل (بالثواني)
+DRAFT_TTL = 7 * 24 * 3600
+# الفترة بين عمليات حذف المسودات القديمة (بالثواني)
+GC_INTERVAL = 3600
+# عدد بصمات الملفات المرفوعة المحفوظة في الذاكرة (حتى لا يعاد حسابها عند كل حفظ)
+DIGESTS_KEPT = 1024
+
+
+class DraftStore:
+    def __init__(self, db_name, files_dir):
+        self._files_dir = files_dir
+        os.makedirs(files_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._digests = OrderedDict()
+        self._db = connect_db(db_name)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS drafts (
+                user TEXT NOT NULL,
+                form TEXT NOT NULL,
+                token TEXT,
+                fields TEXT NOT NULL,
+                files TEXT NOT NULL,
+                updated REAL NOT NULL,
+                PRIMARY KEY (user, form)
+            )""")
+        self._last_gc = 0.0
+        self.collect_garbage()
+
+    def _file_path(self, digest):
+        return os.path.join(self._files_dir, digest)
+
+    def _digest(self, file):
+        # بصمة المحتوى، محفوظة حسب معرف الملف المرفوع
+        # (الحساب نفسه خارج القفل حتى لا تنتظر الجلسات الأخرى قراءة ملف كبير)
+        key = getattr(file, "file_id", None)
+        if key:
+            with self._lock:
+                digest = self._digests.get(key)
+                if digest is not None:
+                    self._digests.move_to_end(key)
+                    return digest
+        digest = getattr(file, "digest", None) or file_digest(file.getvalue())
+        if key:
+            with self._lock:
+                self._digests[key] = digest
+                while len(self._digests) > DIGESTS_KEPT:
+                    self._digests.popitem(last=False)
+        return digest
+
+    def _store_file(self, file, digest):
+        # نفس المحتوى يكتب مرة واحدة فقط مهما تكرر في المسودات
+        path = self._file_path(digest)
+        if os.path.exists(path):
+            return
+        with open(path + ".tmp", "wb") as f:
+            f.write(file.getvalue())
+        os.replace(path + ".tmp", path)
+
+    def save(self, user, form, values, token=None):
+        # حفظ قيم النموذج (تستبدل المسودة السابقة لنفس المستخدم والنموذج)
+        # token: رمز الإرسال الحالي، لحذف المسودة بعد نجاح حفظ نفس البيانات
+        fields = {}
+        files = {}
+        for f in form.fields:
+            value = values.get(f.key)
+            if value is None:
+                continue
+            if f.is_attachment:
+                files[f.key] = (value, self._digest(value))
+            elif f.kind == DATE:
+                fields[f.key] = value.isoformat()
+            else:
+                fields[f.key] = value
+        with self._lock:
+            for file, digest in files.values():
+                self._store_file(file, digest)
+            self._db.execute(
+                "INSERT OR REPLACE INTO drafts (user, form, token, fields, files, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                (user, form.name, token, json.dumps(fields, ensure_ascii=False), json.dumps({
+                    key: {"digest": digest, "name": file.name, "type": getattr(file, "type", None)}
+                    for key, (file, digest) in files.items()}, ensure_ascii=False), time.time()))
+        self.maybe_collect_garbage()
+
+    def load(self, user, form):
+        # (القيم، وقت آخر تعديل) أو None إذا لم توجد مسودة
+        # المرفقات ترجع كـ MemoryAttachment بنفس واجهة الملفات المرفوعة
+        with self._lock:
+            found = self._db.execute(
+                "SELECT fields, files, updated FROM drafts WHERE user = ? AND form = ?", (user, form.name)).fetchone()
+        if found is None:
+            return None
+        values = json.loads(found[0])
+        for key, value in values.items():
+            if form.fields_by_key.get(key) and form.fields_by_key[key].kind == DATE:
+                values[key] = datetime.date.fromisoformat(value)
+        for key, info in json.loads(found[1]).items():
+            try:
+                with open(self._file_path(info["digest"]), "rb") as f:
+                    file = MemoryAttachment(info["name"], f.read(), info["type"])
+            except OSError:
+                continue
+            file.file_id = f"draft:{info['digest']}"
+            file.digest = info["digest"]
+            values[key] = file
+        return values, found[2]
+
+    def set_token(self, user, form_name, token):
+        # ربط المسودة الحالية برمز الإرسال الذي بدأ حفظها، حتى تحذف بعد نجاح الحفظ
+        # ولو كانت قد حفظت برمز سابق (مثلاً قبل فشل محاولة حفظ أخرى)
+        with self._lock:
+            self._db.execute("UPDATE drafts SET token = ? WHERE user = ? AND form = ?", (token, user, form_name))
+
+    def delete(self, user, form_name, token=None):
+        # حذف المسودة، أو فقط إذا كانت ما زالت لنفس رمز الإرسال عند تحديد token
+        with self._lock:
+            if token is None:
+                self._db.execute("DELETE FROM drafts WHERE user = ? AND form = ?", (user, form_name))
+            else:
+                self._db.execute("DELETE FROM drafts WHERE user = ? AND form = ? AND token = ?",
+                                 (user, form_name, token))
+
+    def collect_garbage(self, ttl=DRAFT_TTL):
+        # حذف المسودات الأقدم من ttl ثم ملفات المرفقات التي لا تستخدمها أي مسودة
+        with self._lock:
+            self._last_gc = time.time()
+            self._db.execute("DELETE FROM drafts WHERE updated < ?", (time.time() - ttl,))
+            used = set()
+            for (files,) in self._db.execute("SELECT files FROM drafts"):
+                used.update(info["digest"] for info in json.loads(files).values())
+            removed = 0
+            for name in os.listdir(self._files_dir):
+                if name not in used:
+                    os.remove(os.path.join(self._files_dir, name))
+                    removed += 1
+        return removed
+
+    def maybe_collect_garbage(self):
+        if time.time() - self._last_gc > GC_INTERVAL:
+            self.collect_garbage()
+
+
+@st.cache_resource(show_spinner=False)
+def get_draft_store():
+    return DraftStore("drafts.sqlite3", data_path("draft_files"))
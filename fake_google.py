@@ -0,0 +1,305 @@
+# بديل محلي لخدمات Google (gspread و PyDrive) للعمل والتجربة بدون اتصال بالإنترنت
+# يتم تفعيله بوضع متغير البيئة FAKE_GOOGLE_BACKEND=1
+# ولمحاكاة الشبكة الحقيقية (مثلاً في benchmark.py) يمكن تحديد زمن كل طلب ونسبة فشله:
+#     FAKE_GOOGLE_LATENCY=0.2  FAKE_GOOGLE_ERROR_RATE=0.05
+import io
+import itertools
+import os
+import random
+import threading
+import time
+
+_lock = threading.Lock()
+_ids = itertools.count(1)
+
+# زمن كل طلب (بالثواني) ونسبة الطلبات التي تفشل
+latency = float(os.environ.get("FAKE_GOOGLE_LATENCY", "0"))
+error_rate = float(os.environ.get("FAKE_GOOGLE_ERROR_RATE", "0"))
+# عدم حفظ محتوى الملفات المرفوعة (يحفظ حجمها فقط)، لقياس ذاكرة الرفع نفسه في benchmark.py
+discard_uploads = False
+
+
+class FakeServiceError(Exception):
+    # خطأ مؤقت من الخادم مثل 503 في واجهات Google
+    code = 503
+
+
+class FakeNotFoundError(Exception):
+    # ملف محذوف أو غير موجود في Drive
+    code = 404
+
+
+class FakeFileNotDownloadableError(Exception):
+    # مثل FileNotDownloadableError في PyDrive عند عدم وجود downloadUrl في بيانات الملف
+    pass
+
+
+def configure(request_latency=None, request_error_rate=None, discard=None):
+    global latency, error_rate, discard_uploads
+    if request_latency is not None:
+        latency = request_latency
+    if request_error_rate is not None:
+        error_rate = request_error_rate
+    if discard is not None:
+        discard_uploads = discard
+
+
+def _request():
+    # محاكاة طلب شبكة: انتظار بزمن عشوائي حول latency ثم فشل بنسبة error_rate
+    if latency:
+        time.sleep(random.uniform(0.5, 1.5) * latency)
+    if error_rate and random.random() < error_rate:
+        raise FakeServiceError("503: Service Unavailable (simulated)")
+
+
+def _new_id(prefix):
+    return f"{prefix}-{next(_ids)}"
+
+
+class FakeCell:
+    def __init__(self, row, col, value):
+        self.row = row
+        self.col = col
+        self.value = value
+
+
+class FakeWorksheet:
+    def __init__(self, title="Sheet1"):
+        self.id = 0
+        self.title = title
+        self._rows = []
+
+    @property
+    def row_count(self):
+        return len(self._rows)
+
+    def append_row(self, values, **kwargs):
+        _request()
+        with _lock:
+            self._rows.append(list(values))
+        return {"updates": {"updatedRows": 1}}
+
+    def append_rows(self, values, **kwargs):
+        _request()
+        with _lock:
+            self._rows.extend(list(row) for row in values)
+        return {"updates": {"updatedRows": len(values)}}
+
+    def get_all_values(self, **kwargs):
+        _request()
+        with _lock:
+            return [list(row) for row in self._rows]
+
+    def get_values(self, range_name=None, **kwargs):
+        # يدعم فقط النطاقات بصيغة "A<رقم الصف>:<عمود>" (من صف معين حتى النهاية)
+        _request()
+        start = int(range_name.split(":")[0].lstrip("A")) if range_name else 1
+        with _lock:
+            return [list(row) for row in self._rows[start - 1:]]
+
+    def row_values(self, row, **kwargs):
+        _request()
+        with _lock:
+            if 0 < row <= len(self._rows):
+                return list(self._rows[row - 1])
+            return []
+
+    def col_values(self, col, **kwargs):
+        _request()
+        with _lock:
+            return [row[col - 1] if len(row) >= col else "" for row in self._rows]
+
+    def find(self, query, in_row=None, in_column=None, **kwargs):
+        _request()
+        with _lock:
+            for r, row in enumerate(self._rows, start=1):
+                for c, value in enumerate(row, start=1):
+                    if in_column and c != in_column:
+                        continue
+                    if str(value) == str(query):
+                        return FakeCell(r, c, value)
+        return None
+
+    def update(self, values=None, range_name=None, **kwargs):
+        # يدعم فقط النطاقات بصيغة "A<رقم الصف>"
+        _request()
+        start = int(range_name.lstrip("A"))
+        with _lock:
+            while len(self._rows) < start + len(values) - 1:
+                self._rows.append([])
+            for offset, row in enumerate(values):
+                self._rows[start - 1 + offset] = list(row)
+        return {"updatedRows": len(values)}
+
+
+class FakeSpreadsheet:
+    def __init__(self, title):
+        self.id = _new_id("sheet")
+        self.title = title
+        self.sheet1 = FakeWorksheet()
+
+    def worksheets(self):
+        return [self.sheet1]
+
+    def get_worksheet(self, index):
+        return self.sheet1 if index == 0 else None
+
+
+class FakeClient:
+    def __init__(self):
+        self._by_id = {}
+
+    def open(self, title):
+        _request()
+        with _lock:
+            for sh in self._by_id.values():
+                if sh.title == title:
+                    return sh
+            sh = FakeSpreadsheet(title)
+            self._by_id[sh.id] = sh
+            return sh
+
+    def open_by_key(self, key):
+        _request()
+        with _lock:
+            return self._by_id[key]
+
+
+class FakeDriveFile(dict):
+    def __init__(self, drive, metadata=None):
+        super().__init__(metadata or {})
+        self._drive = drive
+        self.content = None
+        self.permissions = []
+        self._fetched = False
+
+    def _stored(self):
+        with _lock:
+            file = self._drive.files.get(self.get("id"))
+        if file is None:
+            raise FakeNotFoundError(f"404: File not found: {self.get('id')}")
+        return file
+
+    def SetContentString(self, content, encoding="utf-8"):
+        self.content = io.BytesIO(content.encode(encoding))
+
+    def SetContentFile(self, filename):
+        with open(filename, "rb") as f:
+            self.content = io.BytesIO(f.read())
+
+    def Upload(self, param=None):
+        if "id" not in self:
+            self["id"] = _new_id("file")
+            self["alternateLink"] = f"https://drive.google.com/file/d/{self['id']}/view"
+        if self.content is not None:
+            self["fileSize"] = str(len(self.content.getvalue()))
+            self["downloadUrl"] = f"https://www.googleapis.com/drive/v2/files/{self['id']}?alt=media"
+        with _lock:
+            self._drive.files[self["id"]] = self
+
+    def InsertPermission(self, new_permission):
+        _request()
+        self._stored().permissions.append(dict(new_permission))
+        return new_permission
+
+    def FetchMetadata(self, fields=None, fetch_all=False):
+        # مثل PyDrive: تحفظ الحقول المطلوبة فقط، ويعتبر الملف مجلوباً فلا تعيد FetchContent جلب البيانات
+        _request()
+        stored = self._stored()
+        keys = list(stored) if fetch_all or not fields else [key.strip() for key in fields.split(",")]
+        self.update({key: stored[key] for key in keys if key in stored})
+        self._fetched = True
+
+    def FetchContent(self, mimetype=None, remove_bom=False):
+        if not self._fetched:
+            self.FetchMetadata()
+        if "downloadUrl" not in self:
+            raise FakeFileNotDownloadableError("No downloadLink/exportLinks for mimetype found in metadata")
+        _request()
+        self.content = io.BytesIO(self._stored().content.getvalue())
+
+    def GetContentString(self, encoding="utf-8"):
+        return self.content.getvalue().decode(encoding)
+
+
+class FakeFileList:
+    def __init__(self, files):
+        self._files = files
+
+    def GetList(self):
+        return list(self._files)
+
+    def __iter__(self):
+        # صفحة واحدة تحتوي جميع الملفات
+        yield self.GetList()
+
+
+class FakeInsertRequest:
+    # رفع قابل للاستئناف: يقرأ المحتوى جزءاً جزءاً من MediaIoBaseUpload
+    def __init__(self, drive, body, media_body):
+        self._drive = drive
+        self._body = body
+        self._media = media_body
+        self._received = io.BytesIO()
+        self._offset = 0
+
+    def next_chunk(self, http=None, num_retries=0):
+        _request()
+        chunk = self._media.getbytes(self._offset, self._media.chunksize())
+        self._offset += len(chunk)
+        if not discard_uploads:
+            self._received.write(chunk)
+        if self._offset < self._media.size():
+            return None, None
+        file = FakeDriveFile(self._drive, self._body)
+        if discard_uploads:
+            file["fileSize"] = str(self._offset)
+        else:
+            file.content = self._received
+        file.Upload()
+        return None, dict(file)
+
+
+class FakeFilesService:
+    def __init__(self, drive):
+        self._drive = drive
+
+    def insert(self, body=None, media_body=None, **kwargs):
+        return FakeInsertRequest(self._drive, body, media_body)
+
+
+class FakeService:
+    def __init__(self, drive):
+        self._files = FakeFilesService(drive)
+
+    def files(self):
+        return self._files
+
+
+class FakeAuth:
+    # مثل GoogleAuth في PyDrive: service يبقى None حتى استدعاء Authorize
+    def __init__(self, drive):
+        self._drive = drive
+        self.service = None
+
+    def Authorize(self):
+        _request()
+        self.service = FakeService(self._drive)
+
+    def Get_Http_Object(self):
+        return None
+
+
+class FakeDrive:
+    def __init__(self):
+        self.files = {}
+        self.auth = FakeAuth(self)
+
+    def CreateFile(self, metadata=None):
+        # مثل PyDrive: CreateFile({'id': ...}) ينشئ مقبضاً جديداً بالمعرف فقط دون طلب بياناته
+        return FakeDriveFile(self, metadata)
+
+    def ListFile(self, param=None):
+        _request()
+        with _lock:
+            return FakeFileList(list(self.files.values()))
@@ -0,0 +1,236 @@
+# تعريف النماذج الثلاثة في مكان واحد: الحقول وأنواعها والمرفقات وترتيب الأعمدة
+# منها يتم توليد عناصر الإدخال وصف Google Sheets وملف PDF والتحقق من البيانات.
+# يتم تجهيز التعريفات مرة واحدة عند استيراد الملف وليس عند كل إعادة تشغيل للصفحة
+import datetime
+from dataclasses import dataclass, field as dataclass_field
+
+from attachments import size_error
+
+TEXT = "text"
+NUMBER = "number"
+DATE = "date"
+SELECT = "select"
+FILE = "file"
+
+ATTACHMENT_TYPES = ("jpg", "jpeg", "png", "pdf")
+
+MIN_DATE = datetime.date(1900, 1, 1)
+
+# أعمدة تضاف بعد حقول النموذج في كل صف: المستخدم الذي حفظ السجل ووقت الحفظ
+AUDIT_COLUMNS = ("المستخدم", "وقت الحفظ")
+
+
+@dataclass(frozen=True)
+class Field:
+    key: str
+    label: str
+    kind: str = TEXT
+    # العنوان المستخدم في ملف PDF إذا كان مختلفاً عن عنوان الحقل
+    pdf_label: str = None
+    options: tuple = ()
+    required: bool = False
+    # (مفتاح حقل، قيمة): يظهر الحقل فقط عندما يكون للحقل الآخر هذه القيمة
+    show_if: tuple = None
+    # لا يسمح بتكرار القيمة في الورقة (يستخدم لكشف الإدخال المكرر)
+    unique: bool = False
+
+    @property
+    def is_attachment(self):
+        return self.kind == FILE
+
+    @property
+    def pdf_title(self):
+        return self.pdf_label or self.label
+
+
+@dataclass(frozen=True)
+class Form:
+    name: str
+    # اسم الورقة في google_services.SHEET_TITLES
+    sheet: str
+    menu_title: str
+    page_title: str
+    pdf_title: str
+    pdf_file_name: str
+    fields: tuple
+    download_label: str = "اضغط هنا للتحميل"
+    # يتم حسابها مرة واحدة في __post_init__
+    attachments: tuple = dataclass_field(default=(), init=False)
+    unique_fields: tuple = dataclass_field(default=(), init=False)
+    fields_by_key: dict = dataclass_field(default=None, init=False, compare=False)
+
+    def __post_init__(self):
+        keys = [f.key for f in self.fields]
+        if len(keys) != len(set(keys)):
+            raise ValueError(f"مفاتيح مكررة في النموذج {self.name}")
+        by_key = {f.key: f for f in self.fields}
+        for f in self.fields:
+            if f.show_if and f.show_if[0] not in by_key:
+                raise ValueError(f"الحقل {f.key} يعتمد على حقل غير موجود: {f.show_if[0]}")
+        object.__setattr__(self, "attachments", tuple(f for f in self.fields if f.is_attachment))
+        object.__setattr__(self, "unique_fields", tuple(f for f in self.fields if f.unique))
+        object.__setattr__(self, "fields_by_key", by_key)
+
+    @property
+    def columns(self):
+        # أسماء أعمدة الورقة بالترتيب
+        return [f.label for f in self.fields] + list(AUDIT_COLUMNS)
+
+    def column_number(self, key):
+        # رقم العمود في الورقة (يبدأ من 1)
+        return [f.key for f in self.fields].index(key) + 1
+
+
+def is_visible(field, values):
+    if not field.show_if:
+        return True
+    key, expected = field.show_if
+    return values.get(key) == expected
+
+
+def validate(form, values):
+    # إرجاع قائمة برسائل الأخطاء (فارغة إذا كانت البيانات صحيحة)
+    errors = []
+    for f in form.fields:
+        if not is_visible(f, values):
+            continue
+        value = values.get(f.key)
+        if f.is_attachment and value is not None:
+            error = size_error(value)
+            if error:
+                errors.append(error)
+        if f.required and (value is None or (isinstance(value, str) and not value.strip())):
+            errors.append(f"الحقل \"{f.label}\" مطلوب")
+    return errors
+
+
+def _cell(f, value):
+    if value is None:
+        return None
+    if f.kind == DATE:
+        return str(value)
+    return value
+
+
+def sheet_row(form, values, links, user=None):
+    # صف Google Sheets بترتيب الأعمدة، والمرفقات تكتب كروابط
+    # user: اسم المستخدم الذي سجل الدخول، يكتب في أعمدة AUDIT_COLUMNS مع وقت الحفظ
+    row = []
+    for f in form.fields:
+        if not is_visible(f, values):
+            row.append(None)
+        elif f.is_attachment:
+            row.append(links.get(f.key))
+        else:
+            row.append(_cell(f, values.get(f.key)))
+    row += [user, datetime.datetime.now().isoformat(sep=" ", timespec="seconds")]
+    return row
+
+
+def attachment_files(form, values):
+    # ملفات المرفقات بنفس ترتيب form.attachments (None للمرفقات المخفية أو الفارغة)
+    return [values.get(f.key) if is_visible(f, values) else None for f in form.attachments]
+
+
+def pdf_content(form, values):
+    # البيانات والصور المطلوبة لـ pdf_export.generate_pdf
+    data = {"title": form.pdf_title}
+    images = {}
+    for f in form.fields:
+        visible = is_visible(f, values)
+        if f.is_attachment:
+            images[f.pdf_title] = values.get(f.key) if visible else None
+        elif visible:
+            data[f.pdf_title] = _cell(f, values.get(f.key))
+    return data, images
+
+
+def _attachment(key, label, pdf_label, **kwargs):
+    return Field(key, label, FILE, pdf_label=pdf_label, **kwargs)
+
+
+# الحقول المشتركة بين نموذجي الموظفين والعقود
+def _personnel_fields(date_key, date_label, order_label, order_pdf_label):
+    return (
+        Field("computer_no", "رقم الحاسبة", required=True, unique=True),
+        Field("badge_no", "رقم الشعار", unique=True),
+        Field("department", "القسم"),
+        Field("full_name", "الإسم الرباعي واللقب", required=True),
+        Field("mother_name", "اسم الأم الثلاثي"),
+        Field("birth_date", "المواليد", DATE),
+        Field("marital_status", "متزوج", SELECT, pdf_label="الحالة الزوجية", options=("نعم", "لا")),
+        _attachment("marriage_contract", "ارفاق عقد الزواج", "عقد الزواج", show_if=("marital_status", "نعم")),
+        Field("family_count", "عدد الأفراد", NUMBER),
+        Field("first_child", "اول طفل"),
+        Field("second_child", "ثاني طفل"),
+        Field("third_child", "ثالث طفل"),
+        Field("fourth_child", "رابع طفل"),
+        Field("address", "عنوان السكن"),
+        Field("nearby_landmark", "أقرب نقطه دالة"),
+        Field(date_key, date_label, DATE),
+        _attachment("administrative_order", order_label, order_pdf_label),
+        Field("permit_number", "رقم التصريح"),
+        _attachment("permit_copy", "ارفاق نسخة من التصريح", "نسخة من التصريح"),
+        _attachment("national_id_front", "ارفاق نسخة من البطاقة الوطنية/الواجهه", "البطاقة الوطنية/الواجهه"),
+        _attachment("national_id_back", "ارفاق نسخة من البطاقة الوطنية/الضهر", "البطاقة الوطنية/الضهر"),
+        _attachment("housing_card_front", "ارفاق نسخة من بطاقه السكن/ الوجه", "بطاقة السكن/الوجه"),
+        _attachment("housing_card_back", "ارفاق نسخة من بطاقه السكن/الضهر", "بطاقة السكن/الضهر"),
+        Field("mobile", "رقم الموبايل"),
+        Field("data_entry_name", "اسم مدخل البيانات"),
+    )
+
+
+EMPLOYEES = Form(
+    name="employees",
+    sheet="employees",
+    menu_title="إضافة بيانات الموظفين",
+    page_title="إضافة بيانات الموظف",
+    pdf_title="نموذج بيانات الموظف",
+    pdf_file_name="بيانات_الموظف.pdf",
+    fields=_personnel_fields("appointment_date", "تاريخ التعيين", "الامر الاداري للتعيين", "الامر الاداري للتعيين"),
+)
+
+CONTRACTS = Form(
+    name="contracts",
+    sheet="contracts",
+    menu_title="إضافة بيانات العقود",
+    page_title="إضافة بيانات العقد",
+    pdf_title="نموذج بيانات العقد",
+    pdf_file_name="بيانات_العقد.pdf",
+    fields=_personnel_fields("contract_date", "تاريخ التعاقد", "الامر الاداري للتعاقد", "الامر الاداري للتعاقد"),
+)
+
+SERVICE = Form(
+    name="service",
+    sheet="service",
+    menu_title="إضافة بيانات العاملين بصفة شراء خدمات",
+    page_title="إضافة بيانات العاملين بصفة شراء خدمات",
+    pdf_title="نموذج بيانات العامل بصفة شراء خدمات",
+    pdf_file_name="بيانات_العامل_شراء_خدمات.pdf",
+    download_label="اضغط هنا للتحميل كملف PDF",
+    fields=(
+        Field("computer_no", "الحاسبة /رقم", pdf_label="رقم الحاسبة", required=True, unique=True),
+        Field("full_name", "الإسم الرباعي واللقب", required=True),
+        Field("mother_name", "اسم الأم الثلاثي"),
+        Field("birth_date", "المواليد", DATE),
+        Field("address", "عنوان السكن"),
+        Field("nearby_landmark", "أقرب نقطه دالة"),
+        Field("department", "القسم"),
+        Field("subdepartment", "الشعبة"),
+        Field("specialty", "الاختصاص"),
+        Field("job_location", "موقع العمل"),
+        Field("job_type", "نوع الدوام"),
+        _attachment("bsc_copy", "نسخة من الوثيقه( بكالوريوس)(دبلوم)", "نسخة من الوثيقه( بكالوريوس)(دبلوم)"),
+        Field("permit_number", "رقم التصريح"),
+        _attachment("permit_copy", "ارفاق نسخة من التصريح", "نسخة من التصريح"),
+        _attachment("national_id_front", "ارفاق نسخة من البطاقة الوطنية/الواجهه", "البطاقة الوطنية/الواجهه"),
+        _attachment("national_id_back", "ارفاق نسخة من البطاقة الوطنية/الضهر", "البطاقة الوطنية/الضهر"),
+        _attachment("housing_card_front", "ارفاق نسخة من بطاقه السكن/ الوجه", "بطاقه السكن/ الوجه"),
+        _attachment("housing_card_back", "ارفاق نسخة من بطاقه السكن/الضهر", "بطاقه السكن/الضهر"),
+        Field("mobile", "رقم الموبايل"),
+        Field("data_entry_name", "اسم مدخل البيانات"),
+    ),
+)
+
+FORMS = {form.name: form for form in (EMPLOYEES, CONTRACTS, SERVICE)}
+FORMS_BY_MENU_TITLE = {form.menu_title: form for form in FORMS.values()}
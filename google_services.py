@@ -0,0 +1,398 @@
+# طبقة الاتصال بخدمات Google
+# يتم إنشاء الاتصال مرة واحدة لكل عملية (process) ومشاركته بين جميع الجلسات
+# بدلاً من إعادة التفويض وفتح الملفات عند كل تفاعل مع الصفحة
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import streamlit as st
+import gspread
+import httplib2
+from oauth2client.service_account import ServiceAccountCredentials
+
+import fake_google
+from metrics import count_error, observe, timed
+from attachment_index import AttachmentIndex, MAX_ENTRIES
+from attachments import file_digest, prepare_attachment, size_error
+
+scope = ["https://spreadsheets.google.com/feeds",
+         "https://www.googleapis.com/auth/spreadsheets",
+         "https://www.googleapis.com/auth/drive.file",
+         "https://www.googleapis.com/auth/drive"]
+
+# أسماء ملفات Google Sheet لكل قسم
+SHEET_TITLES = {
+    "employees": "بيانات الموظفين",
+    "contracts": "بيانات العقود",
+    "service": "بيانات الخدمة",
+}
+
+# رموز الحالة التي تعني أن المقبض المخزن لم يعد صالحاً ويجب إعادة فتح الملف
+STALE_STATUS_CODES = (401, 404)
+# رموز الحالة التي تعني أن ملف المرفق محذوف أو غير موجود في Drive
+MISSING_STATUS_CODES = (404, 410)
+
+# عدد عمليات الرفع المتزامنة لكل عملية (مشترك بين جميع الجلسات)
+UPLOAD_WORKERS = 4
+# عدد عمليات الرفع المحفوظة حسب رمز الإرسال (لإعادة استخدامها عند تكرار الحفظ)
+UPLOAD_TOKENS_KEPT = 256
+# عدد المحاولات لكل خطوة رفع وزمن الانتظار الأولي بين المحاولات (بالثواني)
+UPLOAD_RETRIES = 3
+UPLOAD_BACKOFF = 1.0
+# حجم كل جزء في الرفع القابل للاستئناف (يجب أن يكون من مضاعفات 256 كيلوبايت)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# اسم الخاصية التي تحفظ فيها بصمة المحتوى مع كل ملف في Drive
+DIGEST_PROPERTY = "sha256"
+
+_refresh_lock = threading.Lock()
+
+
+def use_fake_backend():
+    return os.environ.get("FAKE_GOOGLE_BACKEND") == "1"
+
+
+def get_secret(name, default=None):
+    # قراءة قيمة من st.secrets دون فشل إذا لم يوجد ملف الأسرار
+    try:
+        return st.secrets[name]
+    except (KeyError, FileNotFoundError):
+        return default
+
+
+@st.cache_resource(show_spinner=False)
+def get_credentials():
+    if use_fake_backend():
+        return None
+    # جلب بيانات الاعتماد مباشرة من Streamlit secrets
+    credentials_dict = st.secrets["gcp_service_account"]
+    return ServiceAccountCredentials.from_json_keyfile_dict(credentials_dict, scope)
+
+
+def ensure_fresh_credentials():
+    # تجديد رمز الدخول فقط عند انتهاء صلاحيته (PyDrive لا يجدده تلقائياً لحساب الخدمة)
+    credentials = get_credentials()
+    if credentials is None or not credentials.access_token_expired:
+        return
+    with _refresh_lock:
+        if credentials.access_token_expired:
+            with timed("auth.refresh"):
+                credentials.refresh(httplib2.Http())
+
+
+@st.cache_resource(show_spinner=False)
+def get_client():
+    if use_fake_backend():
+        return fake_google.FakeClient()
+    # gspread يجدد الرمز تلقائياً عند الحاجة
+    return gspread.authorize(get_credentials())
+
+
+@st.cache_resource(show_spinner=False)
+def _get_drive():
+    if use_fake_backend():
+        drive = fake_google.FakeDrive()
+    else:
+        # PyDrive ومكتبة googleapiclient يتم استيرادهما عند أول رفع فقط
+        from pydrive.auth import GoogleAuth
+        from pydrive.drive import GoogleDrive
+        gauth = GoogleAuth()
+        gauth.credentials = get_credentials()
+        drive = GoogleDrive(gauth)
+    # auth.service لا ينشأ في PyDrive إلا داخل الدوال المغلفة بـ LoadAuth،
+    # والرفع على أجزاء (_resumable_upload) يستخدمه مباشرة قبل أي استدعاء منها
+    if drive.auth.service is None:
+        drive.auth.Authorize()
+    return drive
+
+
+def get_drive():
+    ensure_fresh_credentials()
+    return _get_drive()
+
+
+# معرفات الملفات بعد أول فتح بالاسم، حتى تتم إعادة الفتح بالمفتاح مباشرة
+_sheet_keys = {}
+
+
+def _sheet_key(name):
+    if name in _sheet_keys:
+        return _sheet_keys[name]
+    keys = get_secret("sheet_keys", {}) if not use_fake_backend() else {}
+    return keys.get(name)
+
+
+@st.cache_resource(show_spinner=False)
+def get_worksheet(name):
+    gc = get_client()
+    key = _sheet_key(name)
+    with timed("sheets.open"):
+        if key:
+            spreadsheet = gc.open_by_key(key)
+        else:
+            # البحث بالاسم يحتاج استعلاماً في Drive لذلك يتم مرة واحدة فقط
+            spreadsheet = gc.open(SHEET_TITLES[name])
+            _sheet_keys[name] = spreadsheet.id
+        return spreadsheet.sheet1
+
+
+def _is_stale(error):
+    if isinstance(error, gspread.exceptions.SpreadsheetNotFound):
+        return True
+    if isinstance(error, gspread.exceptions.APIError):
+        return error.code in STALE_STATUS_CODES
+    return False
+
+
+def with_worksheet(name, action):
+    # تنفيذ عملية على ورقة العمل مع إعادة فتحها مرة واحدة إذا كان المقبض قديماً
+    try:
+        return action(get_worksheet(name))
+    except Exception as e:
+        if not _is_stale(e):
+            raise
+    _sheet_keys.pop(name, None)
+    get_worksheet.clear()
+    return action(get_worksheet(name))
+
+
+def append_row(name, row):
+    with timed("sheets.append_row"):
+        return with_worksheet(name, lambda worksheet: worksheet.append_row(row))
+
+
+def append_rows(name, rows):
+    with timed("sheets.append_rows"):
+        return with_worksheet(name, lambda worksheet: worksheet.append_rows(rows))
+
+
+def rows_from(name, start_row):
+    # قراءة الصفوف من start_row حتى نهاية الورقة فقط (لتحديث النسخة المحلية تدريجياً)
+    with timed("sheets.read_rows"):
+        return with_worksheet(name, lambda worksheet: worksheet.get_values(f"A{start_row}:ZZ"))
+
+
+def column_values(name, column):
+    with timed("sheets.read_column"):
+        return with_worksheet(name, lambda worksheet: worksheet.col_values(column))
+
+
+def update_row(name, column, key, row):
+    # استبدال الصف الذي يحتوي القيمة key في العمود column، وإرجاع False إذا لم يوجد
+    def update(worksheet):
+        cell = worksheet.find(str(key), in_column=column)
+        if cell is None:
+            return False
+        worksheet.update(values=[row], range_name=f"A{cell.row}")
+        return True
+
+    with timed("sheets.update_row"):
+        return with_worksheet(name, update)
+
+
+def connect():
+    # تجهيز الاتصال بالأوراق مسبقاً (تستخدم النسخ المخزنة بعد أول تشغيل)
+    # أما Google Drive فيتم تجهيزه عند أول رفع للملفات
+    for name in SHEET_TITLES:
+        get_worksheet(name)
+
+
+@st.cache_resource(show_spinner=False)
+def _upload_pool():
+    return ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="upload")
+
+
+class DriveFileMissing(Exception):
+    # ملف المرفق محذوف أو غير موجود في Drive (لا فائدة من إعادة المحاولة)
+    pass
+
+
+def _http_status(error):
+    # رمز حالة HTTP من أخطاء البديل المحلي، أو من ApiRequestError في PyDrive (تغلف HttpError)
+    code = getattr(error, "code", None)
+    if code is None and error.args:
+        code = getattr(getattr(error.args[0], "resp", None), "status", None)
+    return code
+
+
+def _with_retries(func, *args):
+    # إعادة المحاولة مع مضاعفة زمن الانتظار في كل مرة
+    for attempt in range(UPLOAD_RETRIES):
+        try:
+            return func(*args)
+        except DriveFileMissing:
+            raise
+        except Exception:
+            if attempt == UPLOAD_RETRIES - 1:
+                raise
+            time.sleep(UPLOAD_BACKOFF * 2 ** attempt)
+
+
+def _resumable_upload(drive, metadata, stream):
+    # رفع المحتوى على أجزاء بحجم UPLOAD_CHUNK_SIZE في جلسة رفع واحدة قابلة للاستئناف،
+    # فلا ينسخ الملف كاملاً إلى الطلب، وعند فشل جزء يستأنف الرفع من آخر جزء وصل
+    from googleapiclient.http import MediaIoBaseUpload
+    media = MediaIoBaseUpload(stream, metadata['mimeType'], chunksize=UPLOAD_CHUNK_SIZE, resumable=True)
+    request = drive.auth.service.files().insert(body=metadata, media_body=media)
+    # مقبض http خاص بهذا الرفع لأن httplib2 لا يدعم الاستخدام من عدة خيوط
+    http = drive.auth.Get_Http_Object()
+    response = None
+    while response is None:
+        _, response = _with_retries(request.next_chunk, http)
+    return response
+
+
+def upload_stream(title, stream, mimetype=None, digest=None):
+    # رفع محتوى ملف مفتوح للقراءة ثم مشاركته وإرجاع الرابط
+    # digest: بصمة المحتوى الأصلي، تحفظ مع الملف لإعادة بناء فهرس المرفقات
+    drive = get_drive()
+    metadata = {'title': title, 'mimeType': mimetype or "application/octet-stream"}
+    if digest:
+        metadata['properties'] = [{'key': DIGEST_PROPERTY, 'value': digest, 'visibility': 'PUBLIC'}]
+    with timed("drive.upload"):
+        uploaded = _resumable_upload(drive, metadata, stream)
+    file_drive = drive.CreateFile({'id': uploaded['id']})
+    with timed("drive.permission"):
+        _with_retries(file_drive.InsertPermission, {
+            'type': 'anyone',
+            'role': 'reader'
+        })
+    return uploaded['alternateLink']
+
+
+def upload_bytes(title, data, mimetype=None, digest=None):
+    # BytesIO يشارك نفس المحتوى في الذاكرة بدون نسخه
+    return upload_stream(title, io.BytesIO(data), mimetype, digest)
+
+
+def _fetch_file(file_id):
+    file_drive = get_drive().CreateFile({'id': file_id})
+    try:
+        # FetchMetadata يعلم الملف كمجلوب، فلا تجلب FetchContent بقية البيانات بعده
+        # ولذلك يجب طلب downloadUrl هنا مع الحقول المستخدمة
+        file_drive.FetchMetadata(fields="title,mimeType,downloadUrl")
+    except Exception as e:
+        if _http_status(e) in MISSING_STATUS_CODES:
+            raise DriveFileMissing(file_id) from e
+        raise
+    file_drive.FetchContent()
+    return file_drive
+
+
+def download_file(file_id):
+    # تحميل ملف من Drive وإرجاع (الاسم، المحتوى، نوع الملف)
+    # DriveFileMissing إذا كان الملف محذوفاً، وتعاد المحاولة عند الأخطاء الأخرى
+    with timed("drive.download"):
+        file_drive = _with_retries(_fetch_file, file_id)
+    return file_drive['title'], file_drive.content.getvalue(), file_drive['mimeType']
+
+
+def _drive_digests():
+    # قراءة بصمات الملفات المرفوعة سابقاً من بيانات Drive (الأحدث أولاً)
+    drive = get_drive()
+    pages = drive.ListFile({
+        'q': "trashed = false",
+        'orderBy': "modifiedDate desc",
+        'maxResults': 1000,
+        'fields': "nextPageToken, items(alternateLink, modifiedDate, properties)",
+    })
+    found = 0
+    for page in pages:
+        for item in page:
+            for prop in item.get('properties') or []:
+                if prop.get('key') == DIGEST_PROPERTY:
+                    yield prop['value'], item['alternateLink'], time.time() - found
+                    found += 1
+        if found >= MAX_ENTRIES:
+            return
+
+
+@st.cache_resource(show_spinner=False)
+def get_attachment_index():
+    return AttachmentIndex("attachments.sqlite3", _drive_digests)
+
+
+_digest_locks = {}
+_digest_locks_lock = threading.Lock()
+
+
+def _digest_lock(digest):
+    with _digest_locks_lock:
+        return _digest_locks.setdefault(digest, threading.Lock())
+
+
+def _upload_attachment(file):
+    # إعادة استخدام رابط نفس المحتوى إذا سبق رفعه، وإلا تجهيز الصورة ورفعها
+    error = size_error(file)
+    if error:
+        raise ValueError(error)
+    digest = file_digest(file.getvalue())
+    index = get_attachment_index()
+    # قفل لكل بصمة حتى لا يرفع نفس الملف مرتين في نفس الوقت
+    with _digest_lock(digest):
+        link = index.get(digest)
+        if link is None:
+            with timed("attachment.prepare"):
+                prepared = prepare_attachment(file)
+            link = upload_bytes(*prepared, digest=digest)
+            index.put(digest, link)
+    with _digest_locks_lock:
+        _digest_locks.pop(digest, None)
+    return link
+
+
+# عمليات الرفع الجارية أو المنتهية لكل رمز إرسال: {token: {(index, file_id): future}}
+_uploads_by_token = OrderedDict()
+_uploads_lock = threading.Lock()
+
+
+def _file_id(file):
+    return getattr(file, "file_id", None) or file.name
+
+
+def _submit_upload(pool, token, index, file):
+    if token is None:
+        return pool.submit(_upload_attachment, file)
+    key = (index, _file_id(file))
+    with _uploads_lock:
+        uploads = _uploads_by_token.setdefault(token, {})
+        _uploads_by_token.move_to_end(token)
+        while len(_uploads_by_token) > UPLOAD_TOKENS_KEPT:
+            _uploads_by_token.popitem(last=False)
+        future = uploads.get(key)
+        # إعادة استخدام الرفع السابق لنفس الملف ما لم يكن قد فشل
+        if future is None or (future.done() and future.exception() is not None):
+            future = uploads[key] = pool.submit(_upload_attachment, file)
+        return future
+
+
+def forget_uploads(token):
+    with _uploads_lock:
+        _uploads_by_token.pop(token, None)
+
+
+def upload_attachments(files, on_progress=None, token=None):
+    # رفع المرفقات بالتوازي مع الحفاظ على ترتيب الروابط حسب موقع كل ملف
+    # on_progress(index, file, error) تستدعى من الخيط الحالي بعد انتهاء كل ملف
+    # token: رمز الإرسال، تكرار الحفظ بنفس الرمز لا يعيد رفع الملفات إلى Drive
+    started = time.perf_counter()
+    links = [None] * len(files)
+    pool = _upload_pool()
+    futures = {
+        _submit_upload(pool, token, index, file): index
+        for index, file in enumerate(files) if file
+    }
+    for future in as_completed(futures):
+        index = futures[future]
+        error = future.exception()
+        if error is None:
+            links[index] = future.result()
+        else:
+            count_error("upload_attachments")
+        if on_progress:
+            on_progress(index, files[index], error)
+    observe("upload_attachments", time.perf_counter() - started)
+    return links
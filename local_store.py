@@ -0,0 +1,18 @@
+# مكان حفظ البيانات المحلية (قوائم الانتظار والفهارس) على القرص
+import os
+import sqlite3
+
+DATA_DIR = os.environ.get("APP_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+
+
+def data_path(name):
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, name)
+
+
+def connect_db(name):
+    # اتصال SQLite مشترك بين الخيوط (يجب حمايته بقفل من قبل المستخدم)
+    conn = sqlite3.connect(data_path(name), check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
@@ -0,0 +1,162 @@
+# قياس زمن كل مرحلة (رفع الملفات، طلبات Drive و Sheets، إنشاء PDF، بدء التشغيل)
+# وعدد الأخطاء فيها، مشتركة بين جميع الجلسات في نفس العملية.
+# تعرض في صفحة الإدارة المخفية وتصدر بصيغة Prometheus إلى ملف و/أو منفذ HTTP:
+#     METRICS_FILE=/var/lib/app/metrics.prom  METRICS_PORT=9108
+# المنفذ يستمع على 127.0.0.1 فقط ما لم يحدد عنوان آخر في METRICS_HOST
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# حدود فئات المدرج التكراري للزمن (بالثواني)
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# الفترة بين كتابة ملف المقاييس (بالثواني)
+EXPORT_INTERVAL = 15.0
+
+METRICS_FILE = os.environ.get("METRICS_FILE")
+METRICS_PORT = os.environ.get("METRICS_PORT")
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+
+_lock = threading.Lock()
+# {اسم المرحلة: [عدد لكل فئة + فئة اللانهاية، المجموع، عدد الأخطاء]}
+_stages = {}
+_exporter_started = False
+
+
+def _stage(name):
+    stage = _stages.get(name)
+    if stage is None:
+        stage = _stages[name] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+    return stage
+
+
+def observe(name, seconds):
+    with _lock:
+        stage = _stage(name)
+        counts = stage[0]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        stage[1] += seconds
+
+
+def count_error(name):
+    with _lock:
+        _stage(name)[2] += 1
+
+
+@contextmanager
+def timed(name):
+    # قياس زمن الكتلة وتسجيل خطأ إذا انتهت باستثناء (الاستثناء يمرر كما هو)
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        count_error(name)
+        raise
+    finally:
+        observe(name, time.perf_counter() - started)
+
+
+def _quantile(counts, total, q):
+    # تقدير تقريبي من حدود الفئات
+    rank = q * total
+    seen = 0
+    for bound, count in zip(BUCKETS + (float("inf"),), counts):
+        seen += count
+        if seen >= rank:
+            return bound
+    return float("inf")
+
+
+def snapshot():
+    # قائمة بملخص كل مرحلة مرتبة بالاسم
+    with _lock:
+        stages = {name: (list(counts), total, errors) for name, (counts, total, errors) in _stages.items()}
+    rows = []
+    for name in sorted(stages):
+        counts, total, errors = stages[name]
+        count = sum(counts)
+        rows.append({
+            "stage": name,
+            "count": count,
+            "errors": errors,
+            "mean": total / count if count else 0.0,
+            "p50": _quantile(counts, count, 0.5) if count else 0.0,
+            "p95": _quantile(counts, count, 0.95) if count else 0.0,
+        })
+    return rows
+
+
+def prometheus_text():
+    with _lock:
+        stages = {name: (list(counts), total, errors) for name, (counts, total, errors) in _stages.items()}
+    lines = [
+        "# HELP app_stage_seconds Duration of each stage in seconds.",
+        "# TYPE app_stage_seconds histogram",
+    ]
+    for name in sorted(stages):
+        counts, total, _ = stages[name]
+        cumulative = 0
+        for bound, count in zip(BUCKETS, counts):
+            cumulative += count
+            lines.append(f'app_stage_seconds_bucket{{stage="{name}",le="{bound:g}"}} {cumulative}')
+        cumulative += counts[-1]
+        lines.append(f'app_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {cumulative}')
+        lines.append(f'app_stage_seconds_sum{{stage="{name}"}} {total:.6f}')
+        lines.append(f'app_stage_seconds_count{{stage="{name}"}} {cumulative}')
+    lines += [
+        "# HELP app_stage_errors_total Number of failed calls of each stage.",
+        "# TYPE app_stage_errors_total counter",
+    ]
+    for name in sorted(stages):
+        lines.append(f'app_stage_errors_total{{stage="{name}"}} {stages[name][2]}')
+    return "\n".join(lines) + "\n"
+
+
+def write_file(path):
+    # كتابة الملف كاملاً ثم استبداله حتى لا يقرأ جامع المقاييس ملفاً ناقصاً
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        f.write(prometheus_text())
+    os.replace(path + ".tmp", path)
+
+
+def _write_periodically(path):
+    while True:
+        try:
+            write_file(path)
+        except OSError:
+            pass
+        time.sleep(EXPORT_INTERVAL)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_exporter():
+    # تشغيل التصدير مرة واحدة لكل عملية حسب متغيرات البيئة
+    global _exporter_started
+    with _lock:
+        if _exporter_started:
+            return
+        _exporter_started = True
+    if METRICS_FILE:
+        threading.Thread(target=_write_periodically, args=(METRICS_FILE,), name="metrics-file", daemon=True).start()
+    if METRICS_PORT:
+        server = ThreadingHTTPServer((METRICS_HOST, int(METRICS_PORT)), _MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
@@ -0,0 +1,108 @@
+# إنشاء ملفات PDF في الذاكرة مباشرة بدون ملفات مؤقتة
+import io
+import os
+import threading
+
+from reportlab import rl_config
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfbase import pdfmetrics
+from pypdf import PdfReader, PdfWriter
+
+from attachments import IMAGE_BOX_PT, is_pdf, prepare_image
+from text_layout import LEADING, TextFlow
+
+# الخط العربي (تأكد من أن الخط يدعم العربية)
+FONT_NAME = "DejaVu"
+FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "DejaVuSans.ttf")
+
+_font_lock = threading.Lock()
+
+# تضمين الصور بصيغة ثنائية بدلاً من ASCII85 (الترميز يتم ببايثون بطيء ويزيد الحجم بنسبة 25%)
+rl_config.useA85 = 0
+
+
+def register_font():
+    # تسجيل الخط مرة واحدة فقط لكل عملية لأن قراءة ملف الخط مكلفة
+    with _font_lock:
+        if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+
+
+def _read_pdf(data):
+    # قراءة ملف PDF المرفق، أو None إذا كان تالفاً أو محمياً بكلمة سر
+    try:
+        reader = PdfReader(io.BytesIO(data))
+        if reader.is_encrypted or not reader.pages:
+            return None
+        return reader
+    except Exception:
+        return None
+
+
+def _merge_pdf_attachments(base, inserts):
+    # إدراج صفحات ملفات PDF المرفقة كما هي بعد صفحة عنوان كل مرفق
+    writer = PdfWriter(clone_from=PdfReader(io.BytesIO(base)))
+    # الإدراج من الأخير حتى لا تتغير مواقع الإدراج السابقة
+    for position, reader in reversed(inserts):
+        for offset, page in enumerate(reader.pages):
+            writer.insert_page(page, position + offset)
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def generate_pdf(data, images):
+    # إنشاء ملف PDF جديد في الذاكرة وإرجاع محتواه
+    register_font()
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    flow = TextFlow(c, FONT_NAME, 12)
+
+    # إعداد العنوان الرئيسي للنموذج (من اليمين لليسار)
+    flow.label(data["title"])
+
+    # إضافة بيانات الموظف إلى ملف PDF بتنسيق "القيمة : العنوان"
+    for label, value in data.items():
+        if label == "title":
+            continue
+        flow.field(label, value)
+
+    # إضافة عنوان المرفقات
+    flow.label("المرفقات:")
+    flow.skip(10)
+
+    # (رقم الصفحة التي تدرج بعدها صفحات المرفق، ملف PDF المرفق)
+    pdf_inserts = []
+
+    # إضافة المرفقات مع وضعها تحت العنوان الخاص بها، كل مرفق في صفحة
+    for label, img in images.items():
+        if img:
+            if is_pdf(img):
+                # ملفات PDF تدمج صفحاتها كما هي بدون تحويلها إلى صور
+                flow.label(label)
+                reader = _read_pdf(img.getvalue())
+                if reader is None:
+                    flow.label("تعذر قراءة الملف المرفق")
+                flow.new_page()
+                if reader is not None:
+                    pdf_inserts.append((c.getPageNumber() - 1, reader))
+                continue
+
+            # العنوان والصورة في نفس الصفحة
+            flow.ensure(LEADING + IMAGE_BOX_PT)
+            flow.label(label)
+
+            # رسم الصورة المصغرة مباشرة من الذاكرة
+            reader = ImageReader(io.BytesIO(prepare_image(img.getvalue())))
+            c.drawImage(reader, 200, flow.y - IMAGE_BOX_PT, width=IMAGE_BOX_PT, height=IMAGE_BOX_PT)
+
+            # صفحة جديدة للصورة التالية
+            flow.new_page()
+
+    c.save()
+    if pdf_inserts:
+        return _merge_pdf_attachments(buffer.getvalue(), pdf_inserts)
+    return buffer.getvalue()
@@ -0,0 +1,61 @@
+# فهرس محلي للقيم الفريدة (رقم الحاسبة، رقم الشعار) في كل ورقة
+# يتم تحميل أعمدة المفاتيح فقط مرة واحدة لكل عملية ثم يحدث مع كل إضافة،
+# حتى يكون كشف الإدخال المكرر بحثاً في الذاكرة بدلاً من قراءة الورقة كاملة
+import threading
+
+import streamlit as st
+
+from google_services import column_values
+from write_queue import get_write_queue
+
+
+def normalize(value):
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+class RecordIndex:
+    def __init__(self, load_column, pending_rows):
+        # load_column(sheet, column) و pending_rows(sheet) مصادر القيم الموجودة
+        self._load_column = load_column
+        self._pending_rows = pending_rows
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self, form):
+        missing = [f for f in form.unique_fields if (form.sheet, f.key) not in self._keys]
+        if not missing:
+            return
+        pending = self._pending_rows(form.sheet)
+        for f in missing:
+            column = form.column_number(f.key)
+            values = {normalize(v) for v in self._load_column(form.sheet, column)}
+            # الصفوف التي ما زالت في قائمة الانتظار ولم تصل إلى الورقة بعد
+            values.update(normalize(row[column - 1]) for row in pending if len(row) >= column)
+            values.discard("")
+            self._keys[(form.sheet, f.key)] = values
+
+    def duplicates(self, form, values):
+        # الحقول الفريدة التي توجد قيمتها مسبقاً في الورقة
+        with self._lock:
+            self._ensure_loaded(form)
+            return [f for f in form.unique_fields
+                    if normalize(values.get(f.key)) in self._keys[(form.sheet, f.key)]]
+
+    def add(self, form, values):
+        with self._lock:
+            self._ensure_loaded(form)
+            for f in form.unique_fields:
+                value = normalize(values.get(f.key))
+                if value:
+                    self._keys[(form.sheet, f.key)].add(value)
+
+    def invalidate(self):
+        with self._lock:
+            self._keys.clear()
+
+
+@st.cache_resource(show_spinner=False)
+def get_record_index():
+    return RecordIndex(column_values, get_write_queue().pending_rows)
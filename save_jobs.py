@@ -0,0 +1,151 @@
+# حفظ النماذج في الخلفية: رفع المرفقات ثم كتابة الصف في Google Sheets
+# يحصل النموذج على رقم العملية فوراً ويمكن متابعة حالة كل مرفق وحالة الكتابة
+# في الورقة بينما يبدأ مدخل البيانات بإدخال السجل التالي
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from drafts import get_draft_store
+from form_schema import attachment_files, sheet_row
+from google_services import forget_uploads, update_row, upload_attachments
+from metrics import count_error, observe
+from record_index import get_record_index, normalize
+from sheet_cache import get_sheet_cache
+from write_queue import FAILED as WRITE_FAILED, FLUSHED, get_write_queue
+
+# عدد عمليات الحفظ التي تعمل في نفس الوقت (مرفقات كل عملية ترفع بالتوازي أيضاً)
+SAVE_WORKERS = 4
+
+# حالات المرفقات والكتابة في الورقة
+WAITING = "waiting"
+RUNNING = "running"
+QUEUED = "queued"
+DONE = "done"
+FAILED = "failed"
+EMPTY = "empty"
+
+
+@st.cache_resource(show_spinner=False)
+def get_save_pool():
+    return ThreadPoolExecutor(max_workers=SAVE_WORKERS, thread_name_prefix="save")
+
+
+class SaveJob:
+    def __init__(self, form, values, token, update_field=None, user=None):
+        # token: رمز الإرسال، يستخدم لرفع المرفقات ولرقم العملية في قائمة انتظار الكتابة
+        # user: المستخدم الذي سجل الدخول، يكتب مع الصف في الورقة
+        self.id = uuid.uuid4().hex[:8]
+        self.form = form
+        self.token = token
+        self.update_field = update_field
+        self.user = user
+        self.title = normalize(values.get("full_name")) or normalize(values.get("computer_no"))
+        self.created = time.time()
+        self._values = values
+        self._lock = threading.Lock()
+        files = attachment_files(form, values)
+        self._attachments = {f.key: (WAITING if file else EMPTY, None) for f, file in zip(form.attachments, files)}
+        self._sheet = (WAITING, None)
+
+    def _set_attachment(self, key, status, detail=None):
+        with self._lock:
+            self._attachments[key] = (status, detail)
+
+    def _set_sheet(self, status, detail=None):
+        with self._lock:
+            self._sheet = (status, detail)
+
+    def attachments(self):
+        # {مفتاح المرفق: (الحالة، التفاصيل)} بدون المرفقات الفارغة
+        with self._lock:
+            return {key: state for key, state in self._attachments.items() if state[0] != EMPTY}
+
+    def sheet(self):
+        with self._lock:
+            status, detail = self._sheet
+        if status == QUEUED:
+            # الصف في قائمة انتظار الكتابة، وحالته تقرأ منها
+            found = get_write_queue().status(self.token)
+            if found and found["status"] == FLUSHED:
+                self._set_sheet(DONE)
+                return DONE, None
+            if found and found["status"] == WRITE_FAILED:
+                detail = f"تعذر الكتابة في الورقة بعد {found['attempts']} محاولات: {found['error']}"
+                self._set_sheet(FAILED, detail)
+                # الصف لن يصل إلى الورقة، فيعاد تحميل فهرس المكررات بدونه
+                get_record_index().invalidate()
+                return FAILED, detail
+            if found and found["error"]:
+                return QUEUED, f"محاولة {found['attempts']}: {found['error']}"
+        return status, detail
+
+    @property
+    def finished(self):
+        return self.sheet()[0] in (DONE, FAILED)
+
+    def run(self):
+        form, values = self.form, self._values
+        started = time.perf_counter()
+        try:
+            files = attachment_files(form, values)
+            for f, file in zip(form.attachments, files):
+                if file:
+                    self._set_attachment(f.key, RUNNING)
+
+            def on_progress(index, file, error):
+                key = form.attachments[index].key
+                if error:
+                    self._set_attachment(key, FAILED, str(error))
+                else:
+                    self._set_attachment(key, DONE)
+
+            links = upload_attachments(files, on_progress, self.token)
+            failed = [file.name for file, link in zip(files, links) if file and link is None]
+            if failed:
+                # لا يكتب صف ناقص المرفقات. المسودة ورمز الإرسال يبقيان، فإعادة الحفظ تكمل
+                # رفع الملفات التي فشلت فقط وتستخدم روابط الملفات التي رفعت
+                self._set_sheet(FAILED, "لم يتم حفظ السجل لفشل رفع: " + "، ".join(failed)
+                                + ". يرجى إعادة الحفظ.")
+                get_record_index().invalidate()
+                return
+            links = {f.key: link for f, link in zip(form.attachments, links)}
+            row = sheet_row(form, values, links, self.user)
+            self._set_sheet(RUNNING)
+            if self.update_field:
+                key = values[self.update_field.key]
+                if update_row(form.sheet, form.column_number(self.update_field.key), key, row):
+                    self._set_sheet(DONE)
+                    # السجل تغير في الورقة، لذلك يعاد تحميل نسختها المحلية عند البحث التالي
+                    get_sheet_cache().invalidate(form.sheet)
+                else:
+                    self._set_sheet(FAILED, "لم يتم العثور على السجل السابق في الورقة (قد يكون ما زال قيد الحفظ)")
+            else:
+                get_write_queue().submit(form.sheet, row, self.token)
+                self._set_sheet(QUEUED)
+            if self._sheet[0] != FAILED:
+                forget_uploads(self.token)
+                if self.user:
+                    # البيانات محفوظة، فلا حاجة لمسودتها ما لم يعدلها المستخدم بعد الحفظ
+                    get_draft_store().delete(self.user, form.name, self.token)
+        except Exception as e:
+            count_error("save_job")
+            self._set_sheet(FAILED, str(e))
+            # القيم أضيفت إلى فهرس المكررات عند بدء العملية
+            get_record_index().invalidate()
+        finally:
+            # حتى وصول الصف إلى قائمة انتظار الكتابة (الإرسال إلى الورقة يقاس في sheets.append_rows)
+            observe("save_job", time.perf_counter() - started)
+            # تحرير محتوى المرفقات من الذاكرة
+            self._values = None
+
+
+def start_save(form, values, token, update_field=None, user=None):
+    # بدء الحفظ في الخلفية وإرجاع العملية فوراً
+    job = SaveJob(form, values, token, update_field, user)
+    # تسجيل القيم الفريدة مباشرة حتى تكشف الضغطة المكررة قبل انتهاء الحفظ
+    get_record_index().add(form, values)
+    get_save_pool().submit(job.run)
+    return job
@@ -0,0 +1,135 @@
+# نسخة محلية (SQLite) من أوراق Google Sheets للبحث والتصفح
+# يتم جلب الصفوف الجديدة فقط عند التحديث (حسب عدد الصفوف المحفوظة محلياً)،
+# ولا يتم التحقق من الورقة أكثر من مرة كل CACHE_TTL ثانية
+import json
+import threading
+import time
+
+import streamlit as st
+
+from google_services import rows_from
+from local_store import connect_db
+from record_index import normalize
+
+# الفترة بين التحقق من وجود صفوف جديدة في الورقة (بالثواني)
+CACHE_TTL = 60
+# أقصى عدد نتائج للبحث
+SEARCH_LIMIT = 100
+
+# الحقول المفهرسة في النسخة المحلية
+INDEXED_FIELDS = ("computer_no", "badge_no", "full_name", "department")
+# الحقول التي يبحث فيها بالتطابق التام، والباقي يبحث فيها ببداية النص
+EXACT_FIELDS = ("computer_no", "badge_no")
+
+
+class SheetCache:
+    def __init__(self, db_name, fetch_rows):
+        # fetch_rows(sheet, start_row) ترجع صفوف الورقة من start_row حتى النهاية
+        self._fetch_rows = fetch_rows
+        # _lock يحمي اتصال قاعدة البيانات فقط، أما الجلب من الورقة فيكون خارج هذا القفل
+        # مع قفل لكل ورقة حتى لا تجلب عدة جلسات نفس الصفوف في نفس الوقت
+        self._lock = threading.Lock()
+        self._refresh_locks = {}
+        # يزيد مع كل invalidate، حتى لا تحفظ صفوف جلبت قبل حذف النسخة المحلية
+        self._generation = 0
+        self._db = connect_db(db_name)
+        # حتى يستخدم LIKE 'نص%' الفهارس
+        self._db.execute("PRAGMA case_sensitive_like = ON")
+        self._db.execute(f"""
+            CREATE TABLE IF NOT EXISTS records (
+                sheet TEXT NOT NULL,
+                row_number INTEGER NOT NULL,
+                {", ".join(f"{key} TEXT" for key in INDEXED_FIELDS)},
+                data TEXT NOT NULL,
+                PRIMARY KEY (sheet, row_number)
+            )""")
+        for key in INDEXED_FIELDS:
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS records_{key} ON records (sheet, {key})")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS sync_state (
+                sheet TEXT PRIMARY KEY,
+                row_count INTEGER NOT NULL,
+                checked REAL NOT NULL
+            )""")
+
+    def _state(self, sheet):
+        found = self._db.execute("SELECT row_count, checked FROM sync_state WHERE sheet = ?", (sheet,)).fetchone()
+        return found or (0, 0.0)
+
+    def _refresh_lock(self, sheet):
+        with self._lock:
+            return self._refresh_locks.setdefault(sheet, threading.Lock())
+
+    def refresh(self, form, force=False):
+        # جلب الصفوف المضافة منذ آخر تحديث إذا انتهت مدة CACHE_TTL
+        with self._refresh_lock(form.sheet):
+            with self._lock:
+                row_count, checked = self._state(form.sheet)
+                generation = self._generation
+            if not force and time.time() - checked < CACHE_TTL:
+                return 0
+            rows = self._fetch_rows(form.sheet, row_count + 1)
+            keys = [f.key for f in form.fields]
+            header = form.fields_by_key["computer_no"].label
+            records = []
+            for number, row in enumerate(rows, start=row_count + 1):
+                values = dict(zip(keys, row))
+                if normalize(values.get("computer_no")) == header:
+                    continue
+                records.append((form.sheet, number, *(normalize(values.get(key)) for key in INDEXED_FIELDS),
+                                json.dumps(values, ensure_ascii=False)))
+            with self._lock:
+                if self._generation != generation:
+                    # تم حذف النسخة المحلية أثناء الجلب، والصفوف تجلب من جديد عند البحث التالي
+                    return 0
+                self._db.execute("BEGIN")
+                self._db.executemany(
+                    f"INSERT OR REPLACE INTO records VALUES ({', '.join('?' * (len(INDEXED_FIELDS) + 3))})",
+                    records)
+                self._db.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)",
+                                 (form.sheet, row_count + len(rows), time.time()))
+                self._db.execute("COMMIT")
+            return len(records)
+
+    def invalidate(self, sheet=None):
+        # حذف النسخة المحلية (لورقة واحدة أو للجميع) ليعاد تحميلها عند البحث التالي
+        with self._lock:
+            self._generation += 1
+            if sheet:
+                self._db.execute("DELETE FROM records WHERE sheet = ?", (sheet,))
+                self._db.execute("DELETE FROM sync_state WHERE sheet = ?", (sheet,))
+            else:
+                self._db.execute("DELETE FROM records")
+                self._db.execute("DELETE FROM sync_state")
+
+    def search(self, form, text, field=None, limit=SEARCH_LIMIT):
+        # البحث في حقل معين أو في جميع الحقول المفهرسة، وإرجاع قائمة قواميس القيم
+        self.refresh(form)
+        text = normalize(text)
+        if not text:
+            return []
+        fields = [field] if field else INDEXED_FIELDS
+        conditions = []
+        params = [form.sheet]
+        for key in fields:
+            if key in EXACT_FIELDS:
+                conditions.append(f"{key} = ?")
+                params.append(text)
+            else:
+                conditions.append(f"{key} LIKE ? ESCAPE '\\'")
+                params.append(text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        params.append(limit)
+        with self._lock:
+            found = self._db.execute(
+                f"SELECT data FROM records WHERE sheet = ? AND ({' OR '.join(conditions)}) "
+                f"ORDER BY row_number LIMIT ?", params).fetchall()
+        return [json.loads(r[0]) for r in found]
+
+    def count(self, form):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM records WHERE sheet = ?", (form.sheet,)).fetchone()[0]
+
+
+@st.cache_resource(show_spinner=False)
+def get_sheet_cache():
+    return SheetCache("sheet_cache.sqlite3", rows_from)
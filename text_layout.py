@@ -0,0 +1,111 @@
+# تنسيق النص العربي في ملفات PDF: تشكيل الحروف واتجاه الكتابة مع التفاف الأسطر
+# الطويلة حسب عرض الخط وإضافة صفحة جديدة تلقائياً عند امتلاء الصفحة
+from functools import lru_cache
+
+import arabic_reshaper
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+try:
+    # التنفيذ المكتوب بلغة Rust في python-bidi 0.5 وما بعده (أسرع بحوالي 20 مرة)
+    from bidi import get_display
+except ImportError:
+    from bidi.algorithm import get_display
+
+# حدود منطقة الكتابة في الصفحة (بالنقاط)
+TOP = 750
+BOTTOM = 50
+RIGHT = 500
+LEFT = 50
+LEADING = 20
+
+
+@lru_cache(maxsize=2048)
+def shape(text):
+    # تجهيز النص للرسم من اليمين لليسار، والنتيجة محفوظة لأن عناوين الحقول ثابتة
+    return get_display(arabic_reshaper.reshape(str(text)))
+
+
+def _split_word(word, font, size, width):
+    # تقسيم كلمة أطول من السطر إلى أجزاء تناسب العرض
+    parts = []
+    current = ""
+    for char in word:
+        if current and stringWidth(current + char, font, size) > width:
+            parts.append(current)
+            current = char
+        else:
+            current += char
+    if current:
+        parts.append(current)
+    return parts
+
+
+@lru_cache(maxsize=1024)
+def wrap(text, font, size, width):
+    # تقسيم النص إلى أسطر لا يتجاوز عرضها width، وإرجاعها جاهزة للرسم
+    # التقسيم يتم على النص المنطقي بعد التشكيل ثم يحول كل سطر إلى ترتيب العرض
+    reshaped = arabic_reshaper.reshape(str(text))
+    space = stringWidth(" ", font, size)
+    lines = []
+    current = []
+    current_width = 0.0
+    for word in reshaped.split():
+        word_width = stringWidth(word, font, size)
+        if word_width > width:
+            pieces = _split_word(word, font, size, width)
+        else:
+            pieces = [word]
+        for piece in pieces:
+            piece_width = stringWidth(piece, font, size) if len(pieces) > 1 else word_width
+            extra = piece_width + (space if current else 0)
+            if current and current_width + extra > width:
+                lines.append(" ".join(current))
+                current = [piece]
+                current_width = piece_width
+            else:
+                current.append(piece)
+                current_width += extra
+    if current:
+        lines.append(" ".join(current))
+    return tuple(get_display(line) for line in lines) or ("",)
+
+
+class TextFlow:
+    # كتابة الأسطر من أعلى الصفحة إلى أسفلها مع الانتقال لصفحة جديدة عند الحاجة
+    def __init__(self, canvas, font, size=12):
+        self.canvas = canvas
+        self.font = font
+        self.size = size
+        self.y = TOP
+        canvas.setFont(font, size)
+
+    def new_page(self):
+        self.canvas.showPage()
+        self.canvas.setFont(self.font, self.size)
+        self.y = TOP
+
+    def ensure(self, height):
+        # الانتقال لصفحة جديدة إذا لم تتسع الصفحة الحالية للارتفاع المطلوب
+        if self.y - height < BOTTOM:
+            self.new_page()
+
+    def skip(self, height):
+        self.y -= height
+
+    def line(self, text, right=RIGHT):
+        self.ensure(0)
+        self.canvas.drawRightString(right, self.y, text)
+        self.y -= LEADING
+
+    def label(self, text):
+        self.line(shape(text))
+
+    def field(self, label, value):
+        # "القيمة : العنوان"، والقيمة الطويلة تلتف تحت نفسها بمحاذاة بدايتها
+        prefix = f" : {shape(label)}"
+        prefix_width = stringWidth(prefix, self.font, self.size)
+        lines = wrap(str(value), self.font, self.size, RIGHT - LEFT - prefix_width)
+        self.ensure(LEADING)
+        self.line(f"{lines[0]}{prefix}")
+        for text in lines[1:]:
+            self.line(text, RIGHT - prefix_width)
@@ -1,218 +1,491 @@
 import streamlit as st
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-from pydrive.auth import GoogleAuth
-from pydrive.drive import GoogleDrive
-import tempfile
-import base64
 import datetime
-import os
-import json
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfbase import pdfmetrics
-import arabic_reshaper
-from bidi.algorithm import get_display
-
-
-def generate_pdf(data, images):
-    # إنشاء ملف PDF جديد
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-    c = canvas.Canvas(temp_file.name, pagesize=letter)
-
-    # إضافة الخط العربي
-    font_path = "DejaVuSans.ttf"  # تأكد من أن الخط يدعم العربية
-    pdfmetrics.registerFont(TTFont('DejaVu', font_path))
-    c.setFont("DejaVu", 12)
-
-    # إعداد العنوان الرئيسي للنموذج (من اليمين لليسار باستخدام arabic_reshaper و python-bidi)
-  
-    reshaped_title = arabic_reshaper.reshape(data["title"])
-    bidi_title = get_display(reshaped_title)
-    c.drawRightString(500, 750, bidi_title)  # رسم العنوان الرئيسي من اليمين لليسار
-
-    # إضافة بيانات الموظف إلى ملف PDF
-    y_position = 730
-    del data["title"]
-    for label, value in data.items():
-        # إعادة تشكيل العنوان والقيمة
-        reshaped_label = arabic_reshaper.reshape(str(label))  
-        reshaped_value = arabic_reshaper.reshape(str(value))
-        bidi_label = get_display(reshaped_label)
-        bidi_value = get_display(reshaped_value)
-        
-        # تنسيق السطر ليكون "القيمة: العنوان"
-        line_text = f"{bidi_value} : {bidi_label}"
-        
-        # كتابة السطر بالكامل من اليمين لليسار باستخدام drawRightString
-        c.drawRightString(500, y_position, line_text)
-        y_position -= 20  # تقليل الموضع العمودي للكتابة أسفل السطر السابق
-
-    # إضافة عنوان المرفقات بشكل صحيح
-    reshaped_label = arabic_reshaper.reshape("المرفقات:")
-    bidi_label = get_display(reshaped_label)
-    c.drawRightString(500, y_position, bidi_label)
-    y_position -= 30
-
-    # إضافة الصور مع وضعها بشكل محاذي للعنوان الخاص بها وزيادة الحجم مع استخدام صفحات جديدة
-    for label, img in images.items():
-        if img:
-            # حفظ الصورة مؤقتًا
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_img:
-                img_path = temp_img.name
-                with open(img_path, 'wb') as f:
-                    f.write(img.getvalue())  # الكتابة إلى الملف المؤقت
-
-                # تحضير النص الخاص بالعنوان واستخدام الاتجاه من اليمين لليسار
-                reshaped_label = arabic_reshaper.reshape(label)
-                bidi_label = get_display(reshaped_label)
-                
-                # رسم العنوان في موضع محدد
-                c.drawRightString(500, y_position, bidi_label)
-                y_position -= 20  # خفض الموضع قليلاً بعد العنوان
-                
-                # رسم الصورة بحجم أكبر في الصفحة الحالية
-                c.drawImage(img_path, 200, y_position-300, width=300, height=300)  # تكبير الصورة
-                y_position -= 320  # خفض الموضع بشكل أكبر بعد إضافة الصورة
-
-                # إضافة صفحة جديدة إذا كانت هناك صورة أخرى
-                c.showPage()
-
-                # إعادة تعيين إعدادات الخط والنص في الصفحة الجديدة
-                pdfmetrics.registerFont(TTFont('DejaVu', font_path))
-                c.setFont("DejaVu", 12)
-                y_position = 750  # إعادة تعيين الموضع في الصفحة الجديدة
-                
-    # حفظ الملف
-    c.save()
-    return temp_file.name
+import tempfile
+import uuid
+import zipfile
+from itertools import islice
+
+from form_schema import DATE, FILE, NUMBER, SELECT, ATTACHMENT_TYPES, MIN_DATE, FORMS_BY_MENU_TITLE
+from form_schema import is_visible, pdf_content, validate
+from sheet_cache import INDEXED_FIELDS, get_sheet_cache
+from assets import STYLE_TAG, logo_data_uri
+from attachments import MAX_UPLOAD_MB
+from auth import current_user, is_admin, login, logout
+from drafts import get_draft_store
+from google_services import connect
+from metrics import prometheus_text, snapshot, start_exporter, timed
+from record_index import get_record_index
+from save_jobs import DONE, FAILED, QUEUED, RUNNING, WAITING, start_save
+from write_queue import get_write_queue
 
 
 # تحديد تاريخ أدنى وحد أقصى
-min_date = datetime.date(1900, 1, 1)
+min_date = MIN_DATE
 max_date = datetime.date.today()
 
-scope = ["https://spreadsheets.google.com/feeds", 
-         "https://www.googleapis.com/auth/spreadsheets",
-         "https://www.googleapis.com/auth/drive.file", 
-         "https://www.googleapis.com/auth/drive"]
+# تجهيز الاتصال بـ Google Sheets (مرة واحدة لكل عملية، ويعاد المحاولة في التشغيل التالي إذا فشل)
+@st.cache_resource(show_spinner=False)
+def startup():
+    start_exporter()
+    with timed("startup"):
+        connect()
+        # تشغيل قائمة انتظار الكتابة لإرسال أي بيانات متبقية من تشغيل سابق
+        get_write_queue()
 
-# قراءة بيانات الاعتماد من st.secrets
-try:
-    credentials_dict = st.secrets["gcp_service_account"]  # جلب بيانات الاعتماد مباشرة من Streamlit secrets
-    credentials = ServiceAccountCredentials.from_json_keyfile_dict(credentials_dict, scope)
-    gc = gspread.authorize(credentials)
-    
-    # فتح ملفات Google Sheet لكل قسم
-    sh_employees = gc.open("بيانات الموظفين")
-    sh_contracts = gc.open("بيانات العقود")
-    sh_service = gc.open("بيانات الخدمة")
 
+try:
+    startup()
 except Exception as e:
     st.error(f"حدث خطأ في إعداد الاتصال: {e}")
-# إعداد Google Drive
-gauth = GoogleAuth()
-gauth.credentials = credentials
-drive = GoogleDrive(gauth)
 
 
-# دالة لرفع الملفات إلى Google Drive وإرجاع الروابط
-def upload_files(files):
-    links = []
-    for file in files:
-        if file:
+# أقصى عدد عمليات حفظ تعرض حالتها في الجلسة
+JOBS_KEPT = 20
+
+STATUS_TEXT = {
+    WAITING: "في الانتظار",
+    RUNNING: "جاري التنفيذ",
+    QUEUED: "في قائمة انتظار الكتابة",
+    DONE: "تم",
+    FAILED: "فشل",
+}
+
+
+# سجل عمليات الحفظ الخاصة بهذه الجلسة (الأحدث في النهاية)
+def session_jobs():
+    return st.session_state.setdefault("save_jobs", [])
+
+
+def _status_line(label, state):
+    status, detail = state
+    text = f"{label}: {STATUS_TEXT[status]}"
+    return f"{text} - {detail}" if detail else text
+
+
+def show_job(job):
+    st.caption(f"رقم العملية {job.id} - {job.title}")
+    for key, state in job.attachments().items():
+        st.write(_status_line(job.form.fields_by_key[key].label, state))
+    st.write(_status_line("الحفظ في Google Sheets", job.sheet()))
+
+
+# عرض حالة عمليات الحفظ، ويتم تحديثها كل ثانية ما دامت هناك عملية جارية
+def show_save_jobs():
+    jobs = session_jobs()
+    if not jobs:
+        return
+
+    def jobs_panel():
+        with st.expander("حالة عمليات الحفظ", expanded=not all(job.finished for job in jobs)):
+            for job in reversed(jobs):
+                show_job(job)
+
+    with st.sidebar:
+        st.fragment(jobs_panel, run_every=None if all(job.finished for job in jobs) else 1)()
+
+
+# التحقق من تسجيل الدخول، وعرض نموذج الدخول إذا لم يكن المستخدم مسجلاً
+# (التحقق من رمز الجلسة لا يحتاج حساب بصمة كلمة السر عند كل إعادة تشغيل)
+def require_login():
+    user = current_user()
+    if user:
+        return user
+    with st.form("login"):
+        username = st.text_input("اسم المستخدم")
+        password = st.text_input("كلمة السر", type="password")
+        submitted = st.form_submit_button("دخول")
+    if submitted:
+        user, error = login(username, password)
+        if error:
+            st.error(error)
+            return None
+        st.rerun()
+    return None
+
+
+def show_user():
+    user = current_user()
+    if user:
+        st.sidebar.caption(f"المستخدم: {user}")
+        st.sidebar.button("تسجيل الخروج", on_click=logout)
+
+
+# مفتاح عنصر الإدخال: رقم النسخة فيه يتغير عند بدء سجل جديد فتفرغ جميع الحقول
+def widget_key(form, field):
+    return f"{form.name}_{field.key}_{st.session_state.get(f'{form.name}_generation', 0)}"
+
+
+# المرفقات المسترجعة من المسودة لهذا النموذج: {مفتاح الحقل: MemoryAttachment}
+def restored_files(form):
+    return st.session_state.setdefault(f"{form.name}_restored", {})
+
+
+# إنشاء عنصر الإدخال المناسب لنوع الحقل
+def render_field(form, field):
+    key = widget_key(form, field)
+    if field.kind == DATE:
+        return st.date_input(field.label, min_value=min_date, max_value=max_date, key=key)
+    if field.kind == SELECT:
+        return st.selectbox(field.label, field.options, key=key)
+    if field.kind == NUMBER:
+        return st.number_input(field.label, min_value=0, step=1, key=key)
+    if field.kind == FILE:
+        uploaded = st.file_uploader(field.label, type=list(ATTACHMENT_TYPES), key=key, max_upload_size=MAX_UPLOAD_MB)
+        restored = restored_files(form).get(field.key)
+        if uploaded is None and restored is not None:
+            # المرفق المحفوظ في المسودة يستخدم بدون إعادة رفعه، ورفع ملف آخر يستبدله
+            caption, remove = st.columns([4, 1])
+            caption.caption(f"مرفق من المسودة: {restored.name}")
+            remove.button("حذف", key=f"{key}_remove", on_click=restored_files(form).pop, args=(field.key, None))
+            return restored
+        return uploaded
+    return st.text_input(field.label, key=key)
+
+
+# عرض حقول النموذج بالترتيب وإرجاع القيم المدخلة
+def render_form(form):
+    values = {}
+    for field in form.fields:
+        if is_visible(field, values):
+            values[field.key] = render_field(form, field)
+        else:
+            values[field.key] = None
+    return values
+
+
+# استرجاع المسودة المحفوظة مرة واحدة عند أول فتح للنموذج في الجلسة
+def restore_draft(form, user):
+    loaded_key = f"{form.name}_draft_loaded"
+    if st.session_state.get(loaded_key):
+        return
+    st.session_state[loaded_key] = True
+    draft = get_draft_store().load(user, form)
+    if draft is None:
+        return
+    values, updated = draft
+    for field in form.fields:
+        value = values.get(field.key)
+        if value is None:
+            continue
+        if field.is_attachment:
+            restored_files(form)[field.key] = value
+        else:
+            # العناصر لم تنشأ بعد في هذا التشغيل لذلك يمكن تحديد قيمها
+            st.session_state[widget_key(form, field)] = value
+    st.info("تم استرجاع البيانات غير المحفوظة من آخر مرة (" +
+            datetime.datetime.fromtimestamp(updated).strftime("%Y-%m-%d %H:%M") + ")")
+
+
+def _draft_signature(form, values):
+    signature = []
+    for field in form.fields:
+        value = values.get(field.key)
+        if field.is_attachment and value is not None:
+            value = (getattr(value, "file_id", None) or value.name, getattr(value, "size", None))
+        signature.append(value)
+    return tuple(signature)
+
+
+# حفظ المسودة تلقائياً عند تغير أي قيمة
+def autosave_draft(form, user, values):
+    signature_key = f"{form.name}_draft_signature"
+    signature = _draft_signature(form, values)
+    if st.session_state.get(signature_key) == signature:
+        return
+    try:
+        get_draft_store().save(user, form, values, submission_token(form))
+    except OSError as e:
+        st.warning(f"تعذر حفظ المسودة: {e}")
+        return
+    st.session_state[signature_key] = signature
+
+
+# رمز الإرسال للنموذج الحالي: تكرار الحفظ بنفس الرمز لا ينشئ صفاً أو ملفات جديدة
+# الرمز يتغير بعد بدء حفظه، إلا إذا فشلت العملية فيبقى لتعيد المحاولة استخدام الملفات المرفوعة
+def submission_token(form):
+    key = f"{form.name}_token"
+    job = st.session_state.get(f"{form.name}_token_job")
+    if key not in st.session_state or (job is not None and job.sheet()[0] != FAILED):
+        st.session_state[key] = uuid.uuid4().hex
+        st.session_state.pop(f"{form.name}_token_job", None)
+    return st.session_state[key]
+
+
+# تفريغ النموذج لإدخال سجل جديد وحذف مسودته
+def clear_form(form):
+    key = f"{form.name}_generation"
+    st.session_state[key] = st.session_state.get(key, 0) + 1
+    st.session_state.pop(f"{form.name}_restored", None)
+    st.session_state.pop(f"{form.name}_token", None)
+    user = current_user()
+    if user:
+        get_draft_store().delete(user, form.name)
+
+
+# بدء رفع المرفقات وحفظ الصف في الخلفية، أو تحديث السجل الموجود إذا تم تحديد update_field
+def save_form(form, values, update_field=None):
+    # العملية تستخدم رمز الإرسال الحالي، والحفظ التالي يحصل على رمز جديد ما لم تفشل
+    token = submission_token(form)
+    user = current_user()
+    if user:
+        # المسودة حفظت بنفس القيم في هذا التشغيل (autosave_draft)، فتربط بهذا الحفظ
+        get_draft_store().set_token(user, form.name, token)
+    job = start_save(form, values, token, update_field, user)
+    st.session_state[f"{form.name}_token_job"] = job
+    jobs = session_jobs()
+    jobs.append(job)
+    del jobs[:-JOBS_KEPT]
+    st.success(f"بدأ حفظ البيانات (رقم العملية {job.id}). يمكنك متابعة الحالة من القائمة الجانبية "
+               "وإدخال السجل التالي.")
+
+
+# صفحة إضافة بيانات لأحد النماذج
+def form_page(form):
+    st.title(form.page_title)
+
+    user = require_login()
+    if not user:
+        return
+
+    restore_draft(form, user)
+    values = render_form(form)
+    autosave_draft(form, user, values)
+
+    duplicate_key = f"{form.name}_duplicates"
+    if st.button("حفظ البيانات"):
+        errors = validate(form, values)
+        for error in errors:
+            st.error(error)
+        if not errors:
+            # الضغطة المكررة تكشف هنا أيضاً لأن القيم تسجل في الفهرس عند بدء الحفظ
             try:
-                file_drive = drive.CreateFile({'title': file.name})
-                
-                with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                    temp_file.write(file.getvalue())
-                    temp_file.close()
-
-                file_drive.SetContentFile(temp_file.name)
-                file_drive.Upload()
-
-                file_drive.InsertPermission({
-                    'type': 'anyone',
-                    'role': 'reader'
-                })
-
-                link = file_drive['alternateLink']
-                links.append(link)
+                duplicates = get_record_index().duplicates(form, values)
             except Exception as e:
-                st.error(f"فشل رفع الملف: {file.name} - {e}")
-                links.append(None)
-        else:
-            links.append(None)
-    return links
-def load_css():
-    css_code = """
-    /* تكبير حجم الخط وتغيير اتجاه النصوص للموقع بالكامل إلى اليمين */
-    body {
-        font-family: Arial, sans-serif;
-        direction: rtl;
-        text-align: right;
-    }
-    /* تكبير حجم العناوين */
-    .main-title, h1, h2, h3, h4, h5, h6 {
-        font-size: 24px; /* حجم أكبر للعناوين */
-        font-weight: bold;
-        color: #333;
-    }
-    /* تكبير حجم النصوص فوق حقول الإدخال */
-    label {
-        font-size: 20px; /* تكبير حجم النص */
-        font-weight: bold;
-        color: #333;
-    }
-    /* محاذاة الشعار بجانب العنوان */
-    .header-container {
-        display: flex;
-        align-items: left;
-        justify-content: flex-end;
-        margin-top: 20px;
-    }
-    .logo {
-        width: 115px;
-        height: auto;
-        margin-left: 15px; /* فراغ بين الشعار والعنوان */
-    }
-    .footer {
-        position: fixed;
-        bottom: 20px;
-        width: 100%;
-        text-align: center;
-        font-size: 14px;
-        color: #333;
-    }
-    """
-    st.markdown(f"<style>{css_code}</style>", unsafe_allow_html=True)
+                # تعذر تحميل المفاتيح من الورقة: القيم تبقى في النموذج ويمكن إعادة الحفظ
+                st.error(f"تعذر التحقق من السجلات المكررة: {e}. يرجى إعادة الحفظ.")
+            else:
+                if duplicates:
+                    st.session_state[duplicate_key] = [field.key for field in duplicates]
+                else:
+                    save_form(form, values)
+
+    if st.session_state.get(duplicate_key):
+        duplicates = [form.fields_by_key[key] for key in st.session_state[duplicate_key]]
+        st.warning("يوجد سجل محفوظ مسبقاً بنفس " + "، ".join(
+            f"{field.label} ({values.get(field.key)})" for field in duplicates))
+        update_column, skip_column = st.columns(2)
+        if update_column.button("تحديث السجل الموجود"):
+            del st.session_state[duplicate_key]
+            save_form(form, values, update_field=duplicates[0])
+        elif skip_column.button("تخطي"):
+            del st.session_state[duplicate_key]
+            st.info("لم يتم حفظ البيانات.")
+
+    st.button("سجل جديد", on_click=clear_form, args=(form,))
+
+    if st.button("تحميل كملف PDF"):
+        # reportlab و pypdf يتم استيرادهما عند أول طلب لملف PDF فقط
+        from pdf_export import generate_pdf
+        data, images = pdf_content(form, values)
+        with timed("pdf.generate"):
+            pdf_bytes = generate_pdf(data, images)
+        st.download_button(
+            label=form.download_label,
+            data=pdf_bytes,
+            file_name=form.pdf_file_name,
+            mime="application/pdf"
+        )
+
+
+# صفحة استيراد مجموعة سجلات من ملف CSV/XLSX مع ملف ZIP للمرفقات
+def bulk_import_page():
+    from bulk_import import read_rows, run_import
+    st.title(BULK_IMPORT_PAGE)
+    user = require_login()
+    if not user:
+        return
+
+    form = FORMS_BY_MENU_TITLE[st.selectbox("نوع البيانات", list(FORMS_BY_MENU_TITLE))]
+    records = st.file_uploader("ملف البيانات", type=["csv", "xlsx"])
+    scans = st.file_uploader("ملف المرفقات (ZIP)", type=["zip"])
+    st.caption("أسماء المرفقات داخل ملف ZIP: <رقم الحاسبة>_<اسم المرفق>.jpg، وأسماء المرفقات المتاحة: "
+               + "، ".join(field.key for field in form.attachments))
+
+    if records and st.button("بدء الاستيراد"):
+        status = st.empty()
+
+        def on_progress(stats):
+            status.info(f"تم استيراد {stats['imported']} سجل ({stats['records_per_second']:.1f} سجل/ثانية)")
+
+        # نقطة الاستئناف مرتبطة بالنموذج واسم الملف وحجمه
+        checkpoint = f"{form.name}_{records.name}_{records.size}"
+        archive = zipfile.ZipFile(scans) if scans else None
+        try:
+            stats = run_import(form, read_rows(records, records.name), archive, checkpoint, on_progress=on_progress,
+                               user=user)
+        except Exception as e:
+            st.error(f"توقف الاستيراد: {e}. يمكنك إعادة المحاولة وسيستأنف من آخر دفعة محفوظة.")
+            return
+        finally:
+            if archive:
+                archive.close()
+        if stats["resumed_from"]:
+            st.info(f"تم الاستئناف بعد الصف {stats['resumed_from']}")
+        st.success(f"تم استيراد {stats['imported']} سجل خلال {stats['elapsed']:.1f} ثانية "
+                   f"({stats['records_per_second']:.1f} سجل/ثانية). السجلات المكررة: {stats['duplicates']}")
+        for number, errors in stats["invalid"]:
+            st.warning(f"الصف {number}: {'، '.join(errors)}")
+        for number, name, error in stats["failed_uploads"]:
+            st.error(f"الصف {number}: فشل رفع الملف {name} - {error}")
+        if stats["held_back"]:
+            st.warning(f"لم يتم استيراد الصفوف {', '.join(map(str, stats['held_back']))} لفشل رفع مرفقاتها. "
+                       "أعد الاستيراد بنفس الملفات لإعادة محاولتها.")
+
+
+# صفحة تصدير ملفات PDF لمجموعة من السجلات المحفوظة
+def batch_export_page():
+    from batch_export import (COMBINED, MAX_EXPORT_BYTES, MAX_EXPORT_MB, MAX_EXPORT_RECORDS, ZIP, date_fields,
+                              export_records, read_records)
+    st.title(BATCH_EXPORT_PAGE)
+    user = require_login()
+    if not user:
+        return
+
+    form = FORMS_BY_MENU_TITLE[st.selectbox("نوع البيانات", list(FORMS_BY_MENU_TITLE))]
+    department = st.text_input("القسم (اتركه فارغاً لجميع الأقسام)")
+    date_key = start = end = None
+    if st.checkbox("التصفية حسب التاريخ"):
+        dates = {field.label: field.key for field in date_fields(form)}
+        date_key = dates[st.selectbox("حقل التاريخ", list(dates))]
+        start = st.date_input("من تاريخ", min_value=min_date, max_value=max_date, value=min_date)
+        end = st.date_input("إلى تاريخ", min_value=min_date, max_value=max_date)
+    mode = st.radio("نوع الملف", [ZIP, COMBINED],
+                    format_func=lambda m: "ملف ZIP (ملف PDF لكل سجل)" if m == ZIP else "ملف PDF واحد")
+    st.caption(f"الحد الأقصى للتصدير مرة واحدة: {MAX_EXPORT_RECORDS} سجل وحجم {MAX_EXPORT_MB:g} ميغابايت. "
+               "لتصدير عدد أكبر يرجى التقسيم حسب القسم أو التاريخ.")
+
+    if st.button("تصدير"):
+        progress = st.empty()
+        records = list(islice(read_records(form, department, date_key, start, end), MAX_EXPORT_RECORDS + 1))
+        if len(records) > MAX_EXPORT_RECORDS:
+            st.error(f"عدد السجلات المطابقة أكثر من {MAX_EXPORT_RECORDS}. يرجى تضييق التصفية.")
+            return
+        skipped = []
+        # الكتابة إلى ملف مؤقت على القرص يحذف تلقائياً بعد الإغلاق
+        with tempfile.TemporaryFile() as output:
+            try:
+                with timed("export.batch"):
+                    count = export_records(form, records, output, mode,
+                                           on_progress=lambda n: progress.info(f"تم تصدير {n} سجل"),
+                                           max_bytes=MAX_EXPORT_BYTES, skipped=skipped)
+            except ValueError as e:
+                st.error(str(e))
+                return
+            except Exception as e:
+                st.error(f"تعذر تصدير السجلات: {e}")
+                return
+            if not count:
+                st.warning("لا توجد سجلات مطابقة.")
+                return
+            if skipped:
+                st.warning("تم التصدير بدون المرفقات التالية لأنها محذوفة من Google Drive:\n\n" + "\n".join(
+                    f"- الصف {number}: {label}" for number, label in skipped))
+            output.seek(0)
+            st.download_button(
+                label=f"تحميل {count} سجل",
+                data=output.read(),
+                file_name=f"{form.name}.zip" if mode == ZIP else f"{form.name}.pdf",
+                mime="application/zip" if mode == ZIP else "application/pdf"
+            )
+
+
+# صفحة البحث في السجلات المحفوظة (من النسخة المحلية للأوراق)
+def search_page():
+    st.title(SEARCH_PAGE)
+    user = require_login()
+    if not user:
+        return
+
+    form = FORMS_BY_MENU_TITLE[st.selectbox("نوع البيانات", list(FORMS_BY_MENU_TITLE))]
+    fields = {"جميع الحقول": None}
+    fields.update({form.fields_by_key[key].label: key for key in INDEXED_FIELDS if key in form.fields_by_key})
+    field = fields[st.selectbox("البحث في", list(fields))]
+    text = st.text_input("نص البحث")
+
+    cache = get_sheet_cache()
+    if st.button("تحديث البيانات من Google Sheets"):
+        cache.invalidate(form.sheet)
+    try:
+        results = cache.search(form, text, field)
+    except Exception as e:
+        st.error(f"تعذر تحميل البيانات: {e}")
+        return
+    st.caption(f"عدد السجلات المحفوظة محلياً: {cache.count(form)}")
+    if text and not results:
+        st.info("لا توجد نتائج.")
+    elif results:
+        st.dataframe([{form.fields_by_key[key].label: value for key, value in result.items()}
+                      for result in results])
+
+
+# صفحة الإدارة المخفية (?page=metrics): زمن كل مرحلة وعدد الأخطاء منذ بدء تشغيل الخادم
+# متاحة فقط للمستخدمين في قائمة admins في الأسرار
+def metrics_page():
+    st.title("مقاييس الأداء")
+    user = require_login()
+    if not user:
+        return
+    if not is_admin(user):
+        st.error("هذه الصفحة متاحة لمدراء النظام فقط.")
+        return
+
+    rows = snapshot()
+    if not rows:
+        st.info("لا توجد قياسات بعد.")
+        return
+    st.dataframe([{
+        "المرحلة": row["stage"],
+        "العدد": row["count"],
+        "الأخطاء": row["errors"],
+        "المتوسط (ثانية)": round(row["mean"], 3),
+        "p50 ≤": row["p50"],
+        "p95 ≤": row["p95"],
+    } for row in rows])
+    st.download_button("تحميل بصيغة Prometheus", prometheus_text(), file_name="metrics.prom", mime="text/plain")
+
 
+def load_css():
+    # نص الأنماط يتم تجهيزه مرة واحدة في assets.py، ويرسل مع كل إعادة تشغيل لأن Streamlit يعيد بناء الصفحة
+    st.markdown(STYLE_TAG, unsafe_allow_html=True)
 
 
 # تحميل CSS
 load_css()
 
 
-# قائمة كلمات السر المقبولة
-passwords = ["0102", "1002", "0120", "1314", "2324"]
-
+BULK_IMPORT_PAGE = "استيراد مجموعة سجلات"
+BATCH_EXPORT_PAGE = "تصدير ملفات PDF"
+SEARCH_PAGE = "البحث في السجلات"
+# لا تظهر في القائمة، وتفتح من الرابط ?page=metrics
+METRICS_PAGE = "metrics"
 
 # الصفحة الرئيسية
 st.sidebar.title("التنقل بين الصفحات")
-page = st.sidebar.selectbox("اختر الصفحة", ["الصفحة الرئيسية", "إضافة بيانات الموظفين", "إضافة بيانات العقود", "إضافة بيانات العاملين بصفة شراء خدمات"])
+page = st.sidebar.selectbox("اختر الصفحة", ["الصفحة الرئيسية", *FORMS_BY_MENU_TITLE, SEARCH_PAGE, BULK_IMPORT_PAGE, BATCH_EXPORT_PAGE])
+show_user()
+show_save_jobs()
 
 
-if page == "الصفحة الرئيسية":
+if st.query_params.get("page") == METRICS_PAGE:
+    metrics_page()
+
+elif page == "الصفحة الرئيسية":
 
     # الشعار والعنوان
-    logo_path = "logo.jpg"
-    with open(logo_path, "rb") as img_file:
-        logo_encoded = base64.b64encode(img_file.read()).decode()
     st.markdown(
         f"""
         <div class="header-container" style="flex-direction: row-reverse; text-align: left;">
-            <img src="data:image/png;base64,{logo_encoded}" class="logo" style="margin-right: 10px;">
+            <img src="{logo_data_uri()}" class="logo" style="margin-right: 10px;">
             <span class="main-title">
                 إضافة بيانات العاملين في شركة مصافي الشمال
             </span>
@@ -221,295 +494,15 @@ if page == "الصفحة الرئيسية":
         unsafe_allow_html=True,
     )
 
-# صفحة إضافة موظف
-elif page == "إضافة بيانات الموظفين":
-    st.title("إضافة بيانات الموظف")
-
-    # إدخال كلمة السر
-    user_password = st.text_input("أدخل كلمة السر", type="password")
-
-    if user_password in passwords:  # التحقق من وجود كلمة السر في القائمة
-        computer_no = st.text_input("رقم الحاسبة")
-        badge_no = st.text_input("رقم الشعار")
-        department = st.text_input("القسم")
-        full_name = st.text_input("الإسم الرباعي واللقب")
-        mother_name = st.text_input("اسم الأم الثلاثي")
-        birth_date = st.date_input("المواليد", min_value=min_date, max_value=max_date)
-        marital_status = st.selectbox("متزوج", ["نعم", "لا"])
-        marriage_contract = st.file_uploader("ارفاق عقد الزواج", type=["jpg", "jpeg", "png", "pdf"]) if marital_status == "نعم" else None
-        family_count = st.number_input("عدد الأفراد", min_value=0, step=1)
-        first_child = st.text_input("اول طفل")
-        second_child = st.text_input("ثاني طفل")
-        third_child = st.text_input("ثالث طفل")
-        fourth_child = st.text_input("رابع طفل")
-        address = st.text_input("عنوان السكن")
-        nearby_landmark = st.text_input("أقرب نقطه دالة")
-        appointment_date = st.date_input("تاريخ التعيين", min_value=min_date, max_value=max_date)
-        administrative_order = st.file_uploader("الامر الاداري للتعيين", type=["jpg", "jpeg", "png", "pdf"])
-        permit_number = st.text_input("رقم التصريح")
-        permit_copy = st.file_uploader("ارفاق نسخة من التصريح", type=["jpg", "jpeg", "png", "pdf"])
-        national_id_front = st.file_uploader("ارفاق نسخة من البطاقة الوطنية/الواجهه", type=["jpg", "jpeg", "png", "pdf"])
-        national_id_back = st.file_uploader("ارفاق نسخة من البطاقة الوطنية/الضهر", type=["jpg", "jpeg", "png", "pdf"])
-        housing_card_front = st.file_uploader("ارفاق نسخة من بطاقه السكن/ الوجه", type=["jpg", "jpeg", "png", "pdf"])
-        housing_card_back = st.file_uploader("ارفاق نسخة من بطاقه السكن/الضهر", type=["jpg", "jpeg", "png", "pdf"])
-        mobile = st.text_input("رقم الموبايل")
-        data_entry_name = st.text_input("اسم مدخل البيانات")
-
-        if st.button("حفظ البيانات"):
-            file_links = upload_files([marriage_contract if marital_status == "نعم" else None, administrative_order, permit_copy, national_id_front, national_id_back, housing_card_front, housing_card_back])
-            worksheet = sh_employees.sheet1
-            worksheet.append_row([computer_no, badge_no, department, full_name, mother_name, str(birth_date), marital_status, file_links[0] if marital_status == "نعم" else None, family_count, first_child, second_child, third_child, fourth_child, address, nearby_landmark, str(appointment_date), file_links[1], permit_number, file_links[2], file_links[3], file_links[4], file_links[5], file_links[6], mobile, data_entry_name])
-            st.success("تم حفظ البيانات بنجاح!")
-        if st.button("تحميل كملف PDF"):
-            # البيانات المراد إضافتها في ملف PDF
-            data = {
-                "رقم الحاسبة": computer_no,
-                "رقم الشعار": badge_no,
-                "القسم": department,
-                "الإسم الرباعي واللقب": full_name,
-                "اسم الأم الثلاثي": mother_name,
-                "المواليد": str(birth_date),
-                "الحالة الزوجية": marital_status,
-                "عدد الأفراد": family_count,
-                "اول طفل": first_child,
-                "ثاني طفل": second_child,
-                "ثالث طفل": third_child,
-                "رابع طفل": fourth_child,
-                "عنوان السكن": address,
-                "أقرب نقطه دالة": nearby_landmark,
-                "تاريخ التعيين": str(appointment_date),
-                "رقم التصريح": permit_number,
-                "رقم الموبايل": mobile,
-                "اسم مدخل البيانات": data_entry_name
-            }
-
-            # إعداد الملفات
-            images = {
-                "عقد الزواج": marriage_contract if marital_status == "نعم" else None,
-                "الامر الاداري للتعيين": administrative_order,
-                "نسخة من التصريح": permit_copy,
-                "البطاقة الوطنية/الواجهه": national_id_front,
-                "البطاقة الوطنية/الضهر": national_id_back,
-                "بطاقة السكن/الوجه": housing_card_front,
-                "بطاقة السكن/الضهر": housing_card_back
-            }
-            data["title"] = "نموذج بيانات الموظف"
-            # إنشاء ملف PDF
-            pdf_file_path = generate_pdf(data, images)
-            with open(pdf_file_path, "rb") as pdf_file:
-                st.download_button(
-                    label="اضغط هنا للتحميل",
-                    data=pdf_file,
-                    file_name="بيانات_الموظف.pdf",
-                    mime="application/pdf"
-                )
-    else:
-        if user_password:  # فقط إظهار الرسالة إذا كانت هناك محاولة إدخال كلمة سر
-            st.error("كلمة السر غير صحيحة. يرجى المحاولة مرة أخرى.")
-
-# --- الصفحة الثانية: إضافة عقد ---
-elif page == "إضافة بيانات العقود":
-    st.title("إضافة بيانات العقد")
-    user_password = st.text_input("أدخل كلمة السر", type="password")
-
-    if user_password in passwords:  # التحقق من وجود كلمة السر في القائمة
-        # إدخال الحقول النصية
-        computer_no = st.text_input("رقم الحاسبة")
-        badge_no = st.text_input("رقم الشعار")
-        department = st.text_input("القسم")
-        full_name = st.text_input("الإسم الرباعي واللقب")
-        mother_name = st.text_input("اسم الأم الثلاثي")
-        birth_date = st.date_input("المواليد", min_value=min_date, max_value=max_date)
-        marital_status = st.selectbox("متزوج", ["نعم", "لا"])
-        marriage_contract = st.file_uploader("ارفاق عقد الزواج", type=["jpg", "jpeg", "png", "pdf"]) if marital_status == "نعم" else None
-        family_count = st.number_input("عدد الأفراد", min_value=0, step=1)
-        
-        # إدخال أسماء الأطفال
-        first_child = st.text_input("اول طفل")
-        second_child = st.text_input("ثاني طفل")
-        third_child = st.text_input("ثالث طفل")
-        fourth_child = st.text_input("رابع طفل")
-        
-        # إدخال البيانات المتبقية
-        address = st.text_input("عنوان السكن")
-        nearby_landmark = st.text_input("أقرب نقطه دالة")
-        contract_date = st.date_input("تاريخ التعاقد", min_value=min_date, max_value=max_date)
-        administrative_order = st.file_uploader("الامر الاداري للتعاقد", type=["jpg", "jpeg", "png", "pdf"])
-        permit_number = st.text_input("رقم التصريح")
-        permit_copy = st.file_uploader("ارفاق نسخة من التصريح", type=["jpg", "jpeg", "png", "pdf"])
-        
-        # إدخال نسخ الوثائق
-        national_id_front = st.file_uploader("ارفاق نسخة من البطاقة الوطنية/الواجهه", type=["jpg", "jpeg", "png", "pdf"])
-        national_id_back = st.file_uploader("ارفاق نسخة من البطاقة الوطنية/الضهر", type=["jpg", "jpeg", "png", "pdf"])
-        housing_card_front = st.file_uploader("ارفاق نسخة من بطاقه السكن/ الوجه", type=["jpg", "jpeg", "png", "pdf"])
-        housing_card_back = st.file_uploader("ارفاق نسخة من بطاقه السكن/الضهر", type=["jpg", "jpeg", "png", "pdf"])
-        
-        # بيانات إضافية
-        mobile = st.text_input("رقم الموبايل")
-        data_entry_name = st.text_input("اسم مدخل البيانات")
-        
-        # زر لحفظ البيانات 
-        if st.button("حفظ البيانات"):
-            # رفع الملفات
-            file_links = upload_files([
-                marriage_contract if marital_status == "نعم" else None,
-                administrative_order,
-                permit_copy,
-                national_id_front,
-                national_id_back,
-                housing_card_front,
-                housing_card_back
-            ])
-            
-            # كتابة البيانات إلى Google Sheets للعقود
-            worksheet = sh_contracts.sheet1
-            worksheet.append_row([computer_no, badge_no, department, full_name, mother_name, str(birth_date),
-                                marital_status, file_links[0] if marital_status == "نعم" else None, family_count,
-                                first_child, second_child, third_child, fourth_child, address, nearby_landmark,
-                                str(contract_date), file_links[1], permit_number, file_links[2],
-                                file_links[3], file_links[4], file_links[5], file_links[6],
-                                mobile, data_entry_name])
-            st.success("تم حفظ البيانات بنجاح!")
-        # زر لحفظ البيانات وتحميلها كملف PDF
-        if st.button("تحميل كملف PDF"):
-            # البيانات المراد إضافتها في ملف PDF
-            data = {
-                "رقم الحاسبة": computer_no,
-                "رقم الشعار": badge_no,
-                "القسم": department,
-                "الإسم الرباعي واللقب": full_name,
-                "اسم الأم الثلاثي": mother_name,
-                "المواليد": str(birth_date),
-                "الحالة الزوجية": marital_status,
-                "عدد الأفراد": family_count,
-                "اول طفل": first_child,
-                "ثاني طفل": second_child,
-                "ثالث طفل": third_child,
-                "رابع طفل": fourth_child,
-                "عنوان السكن": address,
-                "أقرب نقطه دالة": nearby_landmark,
-                "رقم التصريح": permit_number,
-                "رقم الموبايل": mobile,
-                "اسم مدخل البيانات": data_entry_name
-            }
-
-            # إعداد الملفات (المرفقات) للـ PDF
-            images = {
-                "عقد الزواج": marriage_contract if marital_status == "نعم" else None,
-                "الامر الاداري للتعاقد": administrative_order,
-                "نسخة من التصريح": permit_copy,
-                "البطاقة الوطنية/الواجهه": national_id_front,
-                "البطاقة الوطنية/الضهر": national_id_back,
-                "بطاقة السكن/الوجه": housing_card_front,
-                "بطاقة السكن/الضهر": housing_card_back
-            }
-            data["title"] = "نموذج بيانات العقد"
-            # إنشاء ملف PDF باستخدام التابع generate_pdf
-            pdf_file_path = generate_pdf(data, images)
-
-            # إتاحة زر التحميل للمستخدم
-            with open(pdf_file_path, "rb") as pdf_file:
-                st.download_button(
-                    label="اضغط هنا للتحميل",
-                    data=pdf_file,
-                    file_name="بيانات_العقد.pdf",
-                    mime="application/pdf"
-                )
-    else:
-        if user_password:  # فقط إظهار الرسالة إذا كانت هناك محاولة إدخال كلمة سر
-            st.error("كلمة السر غير صحيحة. يرجى المحاولة مرة أخرى.")
-elif page == "إضافة بيانات العاملين بصفة شراء خدمات":
-    st.title("إضافة بيانات العاملين بصفة شراء خدمات")
-    user_password = st.text_input("أدخل كلمة السر", type="password")
-
-    if user_password in passwords:  # التحقق من وجود كلمة السر في القائمة
-        # الحقول المطلوبة حسب الترتيب الجديد
-        computer_no = st.text_input("الحاسبة /رقم")
-        full_name = st.text_input("الإسم الرباعي واللقب")
-        mother_name = st.text_input("اسم الأم الثلاثي")
-        birth_date = st.date_input("المواليد", min_value=datetime.date(1900, 1, 1), max_value=datetime.date.today())
-        address = st.text_input("عنوان السكن")
-        nearby_landmark = st.text_input("أقرب نقطه دالة")
-        department = st.text_input("القسم")
-        subdepa = st.text_input("الشعبة")
-        special = st.text_input("الاختصاص")
-        job_loc = st.text_input("موقع العمل")
-        job_type = st.text_input("نوع الدوام")
-
-        bsc_copy = st.file_uploader("نسخة من الوثيقه( بكالوريوس)(دبلوم)", type=["jpg", "jpeg", "png", "pdf"])
-        permit_number = st.text_input("رقم التصريح")
-        permit_copy = st.file_uploader("ارفاق نسخة من التصريح", type=["jpg", "jpeg", "png", "pdf"])
-        national_id_front = st.file_uploader("ارفاق نسخة من البطاقة الوطنية/الواجهه", type=["jpg", "jpeg", "png", "pdf"])
-        national_id_back = st.file_uploader("ارفاق نسخة من البطاقة الوطنية/الضهر", type=["jpg", "jpeg", "png", "pdf"])
-        housing_card_front = st.file_uploader("ارفاق نسخة من بطاقه السكن/ الوجه", type=["jpg", "jpeg", "png", "pdf"])
-        housing_card_back = st.file_uploader("ارفاق نسخة من بطاقه السكن/الضهر", type=["jpg", "jpeg", "png", "pdf"])
-
-        mobile = st.text_input("رقم الموبايل")
-        data_entry_name = st.text_input("اسم مدخل البيانات")
-
-        # زر الحفظ
-        if st.button("حفظ البيانات"):
-            # رفع الملفات إلى Google Drive والحصول على الروابط
-            file_links = upload_files([
-                bsc_copy, permit_copy, national_id_front, national_id_back,
-                housing_card_front, housing_card_back
-            ])
-            
-            # إضافة البيانات إلى Google Sheets
-            worksheet = sh_service.sheet1
-            worksheet.append_row([
-                computer_no, full_name, mother_name, str(birth_date), address,
-                nearby_landmark, department, subdepa, special, job_loc, job_type,
-                file_links[0],  # bsc_copy
-                permit_number, file_links[1],  # permit_copy
-                file_links[2], file_links[3],  # national_id front/back
-                file_links[4], file_links[5],  # housing card front/back
-                mobile, data_entry_name
-            ])
-
-            st.success("تم حفظ البيانات بنجاح!")
-
-        # زر لتحميل البيانات كملف PDF
-        if st.button("تحميل كملف PDF"):
-            # جمع البيانات في معجم
-            data = {
-                "رقم الحاسبة": computer_no,
-                "الإسم الرباعي واللقب": full_name,
-                "اسم الأم الثلاثي": mother_name,
-                "المواليد": str(birth_date),
-                "عنوان السكن": address,
-                "أقرب نقطه دالة": nearby_landmark,
-                "القسم": department,
-                "الشعبة": subdepa,
-                "الاختصاص": special,
-                "موقع العمل": job_loc,
-                "نوع الدوام": job_type,
-                "رقم التصريح": permit_number,
-                "رقم الموبايل": mobile,
-                "اسم مدخل البيانات": data_entry_name,
-                "title": "نموذج بيانات العامل بصفة شراء خدمات"
-            }
-
-            images = {
-                "نسخة من الوثيقه( بكالوريوس)(دبلوم)": bsc_copy,
-                "نسخة من التصريح": permit_copy,
-                "البطاقة الوطنية/الواجهه": national_id_front,
-                "البطاقة الوطنية/الضهر": national_id_back,
-                "بطاقه السكن/ الوجه": housing_card_front,
-                "بطاقه السكن/الضهر": housing_card_back
-            }
-
-            pdf_file_path = generate_pdf(data, images)
-
-            # عرض زر لتحميل ملف PDF
-            with open(pdf_file_path, "rb") as pdf_file:
-                st.download_button(
-                    label="اضغط هنا للتحميل كملف PDF",
-                    data=pdf_file,
-                    file_name="بيانات_العامل_شراء_خدمات.pdf",
-                    mime="application/pdf"
-                )
-
-    else:
-        if user_password:
-            st.error("كلمة السر غير صحيحة. يرجى المحاولة مرة أخرى.")
+elif page == SEARCH_PAGE:
+    search_page()
+
+elif page == BULK_IMPORT_PAGE:
+    bulk_import_page()
+
+elif page == BATCH_EXPORT_PAGE:
+    batch_export_page()
+
+# صفحات إضافة البيانات (تولد من تعريف النموذج في form_schema.py)
+else:
+    form_page(FORMS_BY_MENU_TITLE[page])
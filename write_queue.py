@@ -0,0 +1,174 @@
+# قائمة انتظار لكتابة الصفوف إلى Google Sheets على دفعات
+# يتم حفظ كل عملية إرسال فوراً في سجل SQLite محلي ثم ترسل في الخلفية باستخدام
+# append_rows، حتى لا تضيع البيانات عند فشل الاتصال أو إعادة تشغيل الخادم
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+import streamlit as st
+
+from google_services import append_rows
+from local_store import connect_db
+
+# أقصى عدد صفوف في طلب append_rows واحد
+BATCH_SIZE = 50
+# الفترة بين محاولات الإرسال العادية (بالثواني)
+FLUSH_INTERVAL = 2.0
+# زمن الانتظار الأولي والأقصى بعد فشل الإرسال
+RETRY_BACKOFF = 5.0
+MAX_BACKOFF = 300.0
+# تجاوز حد الطلبات في Sheets API يحتاج انتظاراً أطول
+RATE_LIMIT_STATUS = 429
+# أخطاء 4xx لا تزول بإعادة المحاولة (صف غير صالح، ورقة محذوفة أو بدون صلاحية)، عدا هذه الرموز
+RETRYABLE_CLIENT_STATUS = (401, 408, RATE_LIMIT_STATUS)
+# عدد المحاولات قبل اعتبار الصف فاشلاً نهائياً عند هذه الأخطاء
+MAX_ATTEMPTS = 5
+
+PENDING = "pending"
+FLUSHED = "flushed"
+FAILED = "failed"
+
+QUEUE_DB = "write_queue.sqlite3"
+
+
+class SheetWriteQueue:
+    def __init__(self, db_name, append_rows):
+        # append_rows(sheet_name, rows) تكتب الصفوف فعلياً
+        self._append_rows = append_rows
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._db = connect_db(db_name)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS submissions (
+                id TEXT PRIMARY KEY,
+                sheet TEXT NOT NULL,
+                row TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                created REAL NOT NULL,
+                flushed REAL
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS submissions_pending ON submissions (status, created)")
+        # الانتظار بعد الفشل لكل ورقة على حدة، حتى لا يوقف فشل ورقة واحدة الكتابة في بقية الأوراق
+        self._backoff = {}
+        self._retry_at = {}
+        # الأوراق التي فشلت دفعتها بخطأ دائم: ترسل صفاً صفاً حتى يعزل الصف الذي سبب الخطأ
+        self._isolate = set()
+        thread = threading.Thread(target=self._run, name="sheet-writer", daemon=True)
+        thread.start()
+
+    def submit(self, sheet, row, submission_id=None):
+        # حفظ الصف في السجل المحلي وإرجاع رقم العملية فوراً
+        # إعادة الإرسال بنفس الرقم لا تضيف صفاً جديداً، إلا إذا كانت قد فشلت نهائياً فترسل من جديد
+        submission_id = submission_id or uuid.uuid4().hex
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO submissions (id, sheet, row, status, created) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET sheet = excluded.sheet, row = excluded.row, status = excluded.status, "
+                "attempts = 0, error = NULL WHERE status = ?",
+                (submission_id, sheet, json.dumps(row, ensure_ascii=False), PENDING, time.time(), FAILED))
+        self._wake.set()
+        return submission_id
+
+    def status(self, submission_id):
+        with self._lock:
+            found = self._db.execute(
+                "SELECT status, attempts, error FROM submissions WHERE id = ?", (submission_id,)).fetchone()
+        if found is None:
+            return None
+        return {"status": found[0], "attempts": found[1], "error": found[2]}
+
+    def pending_rows(self, sheet):
+        with self._lock:
+            return [json.loads(r[0]) for r in self._db.execute(
+                "SELECT row FROM submissions WHERE status = ? AND sheet = ?", (PENDING, sheet))]
+
+    def pending_count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM submissions WHERE status = ?", (PENDING,)).fetchone()[0]
+
+    def flush(self):
+        # إرسال دفعة واحدة لكل ورقة لم يحن وقت إعادة محاولتها بعد، وإرجاع عدد الصفوف المرسلة
+        # فشل ورقة لا يمنع إرسال بقية الأوراق
+        with self._lock:
+            sheets = [r[0] for r in self._db.execute(
+                "SELECT DISTINCT sheet FROM submissions WHERE status = ?", (PENDING,))]
+        self._isolate.intersection_update(sheets)
+        now = time.time()
+        flushed = 0
+        for sheet in sheets:
+            if self._retry_at.get(sheet, 0.0) > now:
+                continue
+            with self._lock:
+                batch = self._db.execute(
+                    "SELECT id, row FROM submissions WHERE status = ? AND sheet = ? ORDER BY created LIMIT ?",
+                    (PENDING, sheet, 1 if sheet in self._isolate else BATCH_SIZE)).fetchall()
+            if not batch:
+                continue
+            ids = [r[0] for r in batch]
+            try:
+                self._append_rows(sheet, [json.loads(r[1]) for r in batch])
+            except Exception as e:
+                self._failed(sheet, ids, e)
+                continue
+            with self._lock:
+                self._db.executemany(
+                    "UPDATE submissions SET status = ?, error = NULL, flushed = ? WHERE id = ?",
+                    [(FLUSHED, time.time(), i) for i in ids])
+            self._backoff.pop(sheet, None)
+            self._retry_at.pop(sheet, None)
+            flushed += len(ids)
+        return flushed
+
+    def _failed(self, sheet, ids, error):
+        code = getattr(error, "code", None)
+        permanent = isinstance(code, int) and 400 <= code < 500 and code not in RETRYABLE_CLIENT_STATUS
+        with self._lock:
+            self._db.executemany(
+                "UPDATE submissions SET attempts = attempts + 1, error = ? WHERE id = ?",
+                [(str(error), i) for i in ids])
+            if permanent and len(ids) == 1:
+                # الصف وحده يفشل بنفس الخطأ: يتوقف إرساله بعد MAX_ATTEMPTS ويظهر فشله لمدخل البيانات
+                self._db.execute(
+                    "UPDATE submissions SET status = ? WHERE id = ? AND attempts >= ?", (FAILED, ids[0], MAX_ATTEMPTS))
+        if permanent and len(ids) > 1:
+            self._isolate.add(sheet)
+        self._backoff[sheet] = self._next_backoff(sheet, error)
+        self._retry_at[sheet] = time.time() + self._backoff[sheet]
+
+    def _next_backoff(self, sheet, error):
+        base = RETRY_BACKOFF * (4 if getattr(error, "code", None) == RATE_LIMIT_STATUS else 1)
+        return min(MAX_BACKOFF, max(base, self._backoff.get(sheet, 0.0) * 2))
+
+    def _run(self):
+        while True:
+            self._wake.wait(FLUSH_INTERVAL)
+            self._wake.clear()
+            try:
+                while self.flush() and self.pending_count():
+                    pass
+            except Exception:
+                # خطأ في السجل المحلي نفسه، تعاد المحاولة في الدورة التالية
+                pass
+
+
+def read_pending_rows(sheet, db_name=QUEUE_DB):
+    # قراءة الصفوف المنتظرة بدون إنشاء SheetWriteQueue، لأن إنشاءها يشغل خيط كتابة آخر
+    # على نفس السجل (مثلاً عند تشغيل bulk_import من سطر الأوامر بجانب الموقع) فتكتب الصفوف مرتين
+    db = connect_db(db_name)
+    try:
+        return [json.loads(r[0]) for r in db.execute(
+            "SELECT row FROM submissions WHERE status = ? AND sheet = ?", (PENDING, sheet))]
+    except sqlite3.OperationalError:
+        # لم يتم إنشاء السجل بعد
+        return []
+    finally:
+        db.close()
+
+
+@st.cache_resource(show_spinner=False)
+def get_write_queue():
+    return SheetWriteQueue(QUEUE_DB, append_rows)